@@ -0,0 +1,311 @@
+import logging
+import numpy
+import runner
+import simulation
+
+# Analytic estimates of the cache hit ratio and hit distance, for pruning a
+# parameter space before running simulations. Every CS is treated as a TTL
+# cache (the Che approximation): cached data stays for the characteristic
+# time of its node, or until it expires if that is sooner, and the
+# characteristic time is the one which fills the CS on average. Request
+# rates are carried along the FIB paths, each node passing on its misses,
+# and the rates and hit probabilities are solved together with NumPy. Since
+# every node on the way back caches the data, a copy is of less use to the
+# nodes below it, which is allowed for in propagate.
+#
+# The PIT is left out (aggregated interests are counted as misses), and
+# data is assumed to return at once, so the estimate is best for light
+# loads. Eviction is modelled as LRU, which the other policies which cache
+# with a fixed probability only approximate.
+
+# Policies whose caching decision is a fixed probability. LCD and ProbCache
+# decide from where the data is on its path, which is not modelled.
+POLICIES = ("fifo", "lru", "lfu", "popularity_ttl")
+
+# Next hops of producers (for their own names), and of names with no route.
+PRODUCER = -1
+NO_ROUTE = -2
+
+
+def routes(sim: simulation.Simulation) -> numpy.ndarray:
+    """Finds the node each node forwards requests for each name to, using
+    the FIBs of a simulation which has been set up.
+
+    Arguments:
+    sim -- Simulation object, after setup
+
+    Returns: 2D numpy array of node ids with a row for each node and a
+             column for each name id; PRODUCER or NO_ROUTE where there is
+             no next node"""
+
+    producers = sim.registry.producers
+    hops = numpy.full((len(sim.nodes), len(sim.registry)), NO_ROUTE)
+    for n in sim.nodes:
+        for name_id in range(0, len(sim.registry)):
+            if producers[name_id] == n.id:
+                hops[n.id, name_id] = PRODUCER
+                continue
+
+            channel_id = n.forwarding_base.lookup(name_id)
+            if channel_id is not None:
+                a, b = sim.channels[channel_id].nodes
+                hops[n.id, name_id] = b if a == n.id else a
+
+    return hops
+
+
+def depths(hops: numpy.ndarray) -> numpy.ndarray:
+    """Counts the hops from each node to the producer of each name.
+
+    Arguments:
+    hops -- 2D numpy array of next nodes, from routes
+
+    Returns: 2D numpy array like hops, -1 where there is no route"""
+
+    depth = numpy.where(hops == PRODUCER, 0, -1)
+    names = numpy.arange(0, hops.shape[1])
+    following = numpy.maximum(hops, 0)
+    for d in range(1, hops.shape[0]):
+        ready = (depth < 0) & (hops >= 0) & (depth[following, names] == d - 1)
+        if not ready.any():
+            break
+        depth[ready] = d
+
+    return depth
+
+
+def cached_shares(rates: numpy.ndarray, lifetimes: numpy.ndarray,
+                  cacheable: numpy.ndarray, prob: float,
+                  times: numpy.ndarray) -> numpy.ndarray:
+    """Calculates the share of time the data of each name is cached at
+    each node, which for Poisson requests is also the probability that a
+    request finds it cached.
+
+    Data is cached for a time t after a miss with probability prob, so the
+    share is prob*rate*t/(1 + prob*rate*t), t being the characteristic time
+    of the node or the lifetime of the data, whichever is shorter.
+
+    Arguments:
+    rates -- 2D numpy array of requests per second at each node for each name
+    lifetimes -- numpy array, seconds until the data of each name expires
+    cacheable -- 2D boolean numpy array, where data can be cached
+    prob -- float, probability that data is cached
+    times -- numpy array, characteristic time of each node
+
+    Returns: 2D numpy array like rates"""
+
+    x = prob*rates*numpy.minimum(times[:, None], lifetimes)
+    return numpy.where(cacheable, x/(1 + x), 0)
+
+
+def characteristic_times(rates: numpy.ndarray, lifetimes: numpy.ndarray,
+                         cacheable: numpy.ndarray, prob: float,
+                         size: int) -> numpy.ndarray:
+    """Solves the characteristic time of every CS, the time which fills it 
+    on average.
+
+    Arguments:
+    rates -- 2D numpy array of requests per second at each node for each name
+    lifetimes -- numpy array, seconds until the data of each name expires
+    cacheable -- 2D boolean numpy array, where data can be cached
+    prob -- float, probability that data is cached
+    size -- int, max number of data in a CS
+
+    Returns: numpy array of the characteristic time of each node, inf if 
+             the CS never fills"""
+
+    # Data is never kept longer than its lifetime, so only CSs which are 
+    # too small for that are solved for, all at once by bisection.
+    times = numpy.full(len(rates), numpy.inf)
+    full = cached_shares(rates, lifetimes, cacheable, prob,
+                         times).sum(axis = 1) > size
+
+    low = numpy.zeros(int(full.sum()))
+    high = numpy.full(len(low), float(lifetimes.max()))
+    for i in range(0, 60):
+        middle = (low + high)/2
+        over = cached_shares(rates[full], lifetimes, cacheable[full], prob,
+                             middle).sum(axis = 1) > size
+        high = numpy.where(over, middle, high)
+        low = numpy.where(over, low, middle)
+
+    times[full] = low
+    return times
+
+
+def propagate(sent: numpy.ndarray, hops: numpy.ndarray, levels: list,
+              keep: numpy.ndarray, prob: float
+              ) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Carries requests towards the producers, furthest nodes first, and 
+    works out the probability that each node finds the data cached.
+
+    Data is cached by every node on its way back, so a node which passed 
+    on a miss caches the data at the same time as the node above it. Its 
+    next request cannot reach the node above until its own copy has gone, 
+    which shortens the time the copy above is of use to it. A stream of 
+    requests from a node below with a share w of the requests is treated 
+    as finding the data cached for keep - w*prob*keep_below seconds, where 
+    keep and keep_below are the times each node keeps the data.
+
+    Arguments:
+    sent -- 2D numpy array of requests per second sent by users at each 
+            node for each name
+    hops -- 2D numpy array of next nodes, from routes
+    levels -- list of (node ids, name ids) arrays of the entries at each 
+              depth
+    keep -- 2D numpy array, seconds each node keeps the data of each name
+    prob -- float, probability that data is cached
+
+    Returns: 2D numpy arrays of requests per second and hit probabilities 
+             at each node for each name"""
+
+    def hit_share(rate: numpy.ndarray, time: numpy.ndarray) -> numpy.ndarray:
+        x = prob*rate*numpy.maximum(time, 0)
+        return x/(1 + x)
+
+    rates = sent.copy()
+    hits = numpy.zeros(sent.shape)
+    # Requests served from the CS of each node, per second.
+    served = numpy.zeros(sent.shape)
+    # Misses passed on by each node, per second.
+    misses = numpy.zeros(sent.shape)
+
+    for d in range(len(levels) - 1, 0, -1):
+        rows, names = levels[d]
+        rate = rates[rows, names]
+
+        # Requests of users at the node are not shadowed by any other copy.
+        served[rows, names] += sent[rows, names]*hit_share(
+            rate, keep[rows, names])
+
+        # Requests passed on by the nodes below.
+        if d + 1 < len(levels):
+            below, below_names = levels[d + 1]
+            above = hops[below, below_names]
+            stream = misses[below, below_names]
+            total = rates[above, below_names]
+            share = numpy.divide(stream, total, out = numpy.zeros(len(stream)),
+                                 where = total > 0)
+            window = (keep[above, below_names] 
+                      - share*prob*keep[below, below_names])
+            numpy.add.at(served, (above, below_names),
+                         stream*hit_share(total, window))
+
+        hits[rows, names] = numpy.divide(served[rows, names], rate, 
+                                         out = numpy.zeros(len(rate)), 
+                                         where = rate > 0)
+        misses[rows, names] = rate*(1 - hits[rows, names])
+        numpy.add.at(rates, (hops[rows, names], names), misses[rows, names])
+
+    return rates, hits
+
+
+def estimate(sim: simulation.Simulation, seed: int = None,
+             iterations: int = 100, tolerance: float = 1e-9) -> dict:
+    """Estimates the cache hit ratio and hit distance of a simulation
+    without running it. The network and workload are set up as for a
+    sample, but no event is run.
+
+    Arguments:
+    sim -- Simulation object
+    seed -- int, seed used to set up the sample; None picks a random one
+    iterations -- int, max number of rounds of the fixed point
+    tolerance -- float, largest change of a hit probability at the end
+
+    Returns: dictionary with the cache_hit_ratio and hit_distance_mean of
+             simulation.summarize, and arrays of the hit ratio, hit
+             distance and characteristic time of each node"""
+
+    for n in range(0, len(sim.node_names)):
+        policy = sim.node_policies.get(n, sim.policy)
+        if policy not in POLICIES:
+            raise ValueError("Policy %s cannot be estimated" % policy)
+
+    sim.setup(seed)
+    registry = sim.registry
+    nodes = len(sim.nodes)
+
+    # Requests sent by users at the nodes with edge channels.
+    edge_nodes = {e["id"]: e["node"] for e in sim.edge_channels}
+    sent = numpy.zeros((nodes, len(registry)))
+    numpy.add.at(sent, [edge_nodes[c] for c in sim.workload.channel_ids.tolist()],
+                 sim.workload.rates(registry))
+
+    hops = routes(sim)
+    depth = depths(hops)
+    lifetimes = numpy.array(registry.lifetimes, float)
+    # Producers answer requests for their own data without caching it.
+    cacheable = depth > 0
+    # Entries at each depth, as (node ids, name ids).
+    levels = [numpy.nonzero(depth == d) for d in range(0, depth.max() + 1)]
+
+    # The CSs start as if they never fill.
+    times = numpy.full(nodes, numpy.inf)
+    hits = numpy.zeros((nodes, len(registry)))
+    for i in range(0, iterations):
+        keep = numpy.where(cacheable, numpy.minimum(times[:, None], lifetimes), 
+                           0)
+        rates, new_hits = propagate(sent, hops, levels, keep, sim.prob)
+        times = characteristic_times(rates, lifetimes, cacheable, sim.prob, 
+                                     sim.cache_size)
+
+        change = numpy.abs(new_hits - hits).max(initial = 0)
+        hits = new_hits
+        if change < tolerance:
+            break
+
+    # Hops a request travels from each node, the producer being the last.
+    distance = numpy.where(depth >= 0, 1.0, numpy.nan)
+    for rows, names in levels[1:]:
+        distance[rows, names] = 1 + (1 - hits[rows, names])*distance[
+            hops[rows, names], names]
+
+    requests = rates.sum(axis = 1)
+    served = (rates*hits).sum(axis = 1)
+    node_hit_ratio = numpy.full(nodes, numpy.nan)
+    node_hit_ratio[requests > 0] = served[requests > 0]/requests[requests > 0]
+
+    # Only requests with a route are counted.
+    routed = numpy.where(depth >= 0, sent, 0)
+    weighted = numpy.where(depth >= 0, sent*distance, 0)
+    node_hit_distance = numpy.full(nodes, numpy.nan)
+    users = routed.sum(axis = 1) > 0
+    node_hit_distance[users] = (weighted.sum(axis = 1)[users]
+                                /routed.sum(axis = 1)[users])
+
+    logging.debug("Estimate converged after %s rounds", i + 1)
+    return {"cache_hit_ratio": float(numpy.nanmean(node_hit_ratio))
+                               if (requests > 0).any() else 0,
+            "hit_distance_mean": float(weighted.sum()/routed.sum())
+                                 if routed.sum() > 0 else 0,
+            "node_hit_ratio": node_hit_ratio,
+            "node_hit_distance": node_hit_distance,
+            "characteristic_time": times}
+
+
+def validate(samples: int = 10, seed: int = None, config: dict = None,
+             workers: int = None) -> dict:
+    """Compares the estimate of a configuration with the results of
+    simulating it.
+
+    Arguments:
+    samples -- int, number of samples simulated
+    seed -- int, the seed of the run; None picks a random one
+    config -- dictionary of arguments for simulation.Simulation
+    workers -- int, number of processes; None uses every core
+
+    Returns: dictionary with metric names as keys and (simulated value,
+             estimated value) as values"""
+
+    estimated = estimate(simulation.Simulation(**(config or {})), seed)
+    summary = simulation.summarize(runner.run(samples, seed = seed,
+                                              workers = workers,
+                                              config = config))
+
+    comparison = {}
+    for key in ("cache_hit_ratio", "hit_distance_mean"):
+        comparison[key] = (summary[key], estimated[key])
+        logging.info("%s: simulated %s, estimated %s", key, summary[key],
+                     estimated[key])
+
+    return comparison
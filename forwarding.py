@@ -0,0 +1,236 @@
+import networkx as nx
+import numpy
+
+# SciPy finds all the shortest paths in one call; without it each producer
+# is handled by networkx.
+try:
+    import scipy.sparse
+    import scipy.sparse.csgraph
+except ImportError:
+    scipy = None
+
+# FIBs already built, with topology signatures as keys.
+FIB_CACHE = {}
+
+
+def components(name: str) -> tuple[str, ...]:
+    """Splits a name or prefix such as "uuv3/mission_info/route" into its
+    components; the empty prefix has none.
+
+    Arguments:
+    name -- String, the name or prefix
+
+    Returns: tuple of Strings"""
+
+    name = name.strip("/")
+    if not name:
+        return ()
+
+    return tuple(name.split("/"))
+
+
+def common_prefix(names: list[str]) -> str:
+    """Finds the longest prefix, in whole components, shared by names; a
+    producer's prefix in the FIBs of the other nodes.
+
+    Arguments:
+    names -- list of Strings, the names
+
+    Returns: String, "" if the names share no component"""
+
+    prefix = components(names[0]) if names else ()
+    for name in names[1:]:
+        name = components(name)
+        length = 0
+        while (length < min(len(prefix), len(name)) 
+               and prefix[length] == name[length]):
+            length += 1
+        prefix = prefix[:length]
+
+    return "/".join(prefix)
+
+
+class NameTrie(object):
+    """Trie of name components which maps prefixes to channel ids and
+    finds the longest prefix of a name that it contains.
+
+    Each trie node is a dictionary with components as keys and child nodes
+    as values; the channel id of a prefix is kept under the key None."""
+
+    def __init__(self):
+        self.root = {}
+        # Number of prefixes in the trie.
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_prefixes(cls, prefixes: dict[str, int]) -> "NameTrie":
+        """Creates a trie from a dictionary of prefixes and channel ids.
+
+        Arguments:
+        prefixes -- dictionary with prefixes as keys and channel ids as values
+
+        Returns: NameTrie"""
+
+        trie = cls()
+        for prefix, channel_id in prefixes.items():
+            trie.insert(prefix, channel_id)
+
+        return trie
+
+    def insert(self, prefix: str, channel_id: int):
+        """Adds a prefix, replacing the channel id if it is already there.
+
+        Arguments:
+        prefix -- String, e.g. "uuv3/" or "" for a default route
+        channel_id -- int, id of the channel to forward to"""
+
+        self.insert_components(components(prefix), channel_id)
+
+    def insert_components(self, prefix: tuple[str, ...], channel_id: int):
+        """Adds a prefix already split into its components, see insert.
+
+        Arguments:
+        prefix -- tuple of Strings, the components of the prefix
+        channel_id -- int, id of the channel to forward to"""
+
+        node = self.root
+        for c in prefix:
+            node = node.setdefault(c, {})
+
+        if None not in node:
+            self.size += 1
+        node[None] = channel_id
+
+    def longest_match(self, name: tuple[str, ...]) -> int:
+        """Finds the channel id of the longest prefix of a name, in time
+        proportional to the depth of the name.
+
+        Arguments:
+        name -- tuple of Strings, the components of the name
+
+        Returns: int, or None if no prefix matches"""
+
+        node = self.root
+        best = node.get(None)
+        for c in name:
+            node = node.get(c)
+            if node is None:
+                break
+            if None in node:
+                best = node[None]
+
+        return best
+
+
+def topology_signature(graph: nx.Graph, producers: dict[int, str],
+                       weight: str) -> tuple:
+    """Creates a key which is the same for the same topology, lengths and
+    producers.
+
+    Returns: tuple"""
+
+    edges = []
+    for u, v, attributes in graph.edges(data = True):
+        edges.append((min(u, v), max(u, v), attributes["id"],
+                      attributes.get(weight, 1)))
+
+    return (tuple(sorted(graph.nodes)), tuple(sorted(edges)),
+            tuple(sorted(producers.items())), weight)
+
+
+def next_channels(graph: nx.Graph, producers: list[int],
+                  weight: str) -> numpy.ndarray:
+    """Finds the channel each node forwards to on its shortest path to
+    each producer.
+
+    Arguments:
+    graph -- networkx graph with channel ids in the edge attribute "id"
+    producers -- list of node ids of the producers
+    weight -- String, edge attribute used as the length of an edge
+
+    Returns: 2D numpy array of channel ids with a row for each producer and
+             a column for each node, in the order of graph.nodes; -1 for the
+             producer itself and nodes with no path to it"""
+
+    order = list(graph.nodes)
+    index = {n: i for i, n in enumerate(order)}
+    size = len(order)
+
+    # Row i of predecessors holds the shortest path tree from producer i,
+    # as indexes into order and a negative value where there is none; in
+    # an undirected graph the predecessor of a node on the path from the
+    # producer is its next hop towards the producer.
+    if scipy is not None:
+        matrix = nx.to_scipy_sparse_array(graph, nodelist = order,
+                                          weight = weight, format = "csr")
+        dist, predecessors = scipy.sparse.csgraph.dijkstra(
+            matrix, directed = False, indices = [index[p] for p in producers],
+            return_predecessors = True)
+        predecessors = predecessors.astype(numpy.int64)
+
+    else:
+        predecessors = numpy.full((len(producers), size), -1, numpy.int64)
+        for row, p in enumerate(producers):
+            pred, dist = nx.dijkstra_predecessor_and_distance(
+                graph, p, weight = weight)
+            for n in pred:
+                if pred[n]:
+                    predecessors[row, index[n]] = index[pred[n][0]]
+
+    # Channel ids of the edges in both directions, sorted by node*size +
+    # neighbour so the channel to each next hop is found by a search.
+    edges = numpy.array([(index[u], index[v], channel_id)
+                         for u, v, channel_id in graph.edges(data = "id")],
+                        numpy.int64).reshape(-1, 3)
+    keys = numpy.concatenate((edges[:, 0]*size + edges[:, 1],
+                              edges[:, 1]*size + edges[:, 0]))
+    ids = numpy.concatenate((edges[:, 2], edges[:, 2]))
+    sort = numpy.argsort(keys)
+    keys = keys[sort]
+    ids = ids[sort]
+
+    channels = numpy.full(predecessors.shape, -1, numpy.int64)
+    routed = predecessors >= 0
+    nodes = numpy.broadcast_to(numpy.arange(0, size), predecessors.shape)
+    channels[routed] = ids[numpy.searchsorted(
+        keys, nodes[routed]*size + predecessors[routed])]
+
+    return channels
+
+
+def build_fibs(graph: nx.Graph, producers: dict[int, str],
+               weight: str = "length") -> dict[int, NameTrie]:
+    """Builds the FIB of every node from shortest paths in the graph, so
+    each node forwards requests for a producer's prefix along the shortest
+    path to it. Results are cached for each topology.
+
+    Arguments:
+    graph -- networkx graph with channel ids in the edge attribute "id"
+    producers -- dictionary with node ids as keys and name prefixes as values
+    weight -- String, edge attribute used as the length of an edge
+
+    Returns: dictionary with node ids as keys and NameTries as values"""
+
+    key = topology_signature(graph, producers, weight)
+    if key in FIB_CACHE:
+        return FIB_CACHE[key]
+
+    order = list(graph.nodes)
+    channels = next_channels(graph, list(producers), weight)
+
+    fibs = {}
+    for n in order:
+        fibs[n] = NameTrie()
+
+    for row, prefix in enumerate(producers.values()):
+        prefix = components(prefix)
+        routed = numpy.flatnonzero(channels[row] >= 0)
+        for i, channel_id in zip(routed.tolist(),
+                                 channels[row, routed].tolist()):
+            fibs[order[i]].insert_components(prefix, channel_id)
+
+    FIB_CACHE[key] = fibs
+    return fibs
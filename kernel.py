@@ -0,0 +1,91 @@
+import heapq
+
+# A lightweight discrete event kernel, the "heap" engine of the simulation.
+# Events are plain callbacks in a heap ordered by time, so the packet path
+# needs no SimPy events, processes or stores.
+
+
+class EventQueue(object):
+    """Runs callbacks in order of time; callbacks scheduled for the same
+    time run in the order they were scheduled.
+
+    Generators can also be run as processes, as long as they only wait for
+    timeouts: timeout returns its delay, and the generator is resumed once
+    the delay it yielded has passed. This way processes written for SimPy,
+    such as Simulation.interest_arrival, run unchanged.
+
+    Arguments:
+    initial_time -- float, time the queue starts at"""
+
+    def __init__(self, initial_time: float = 0):
+        self.now = initial_time
+        # Heap of (time, order, callback, arguments).
+        self.queue = []
+        self.order = 0
+        # Number of callbacks run so far.
+        self.processed = 0
+
+    def schedule(self, delay: float, callback, *args):
+        """Schedules a callback.
+
+        Arguments:
+        delay -- float, seconds from now the callback runs at
+        callback -- function called with args"""
+
+        heapq.heappush(self.queue, (self.now + delay, self.order, callback,
+                                    args))
+        self.order += 1
+
+    def timeout(self, delay: float) -> float:
+        """What a process yields to wait for a delay.
+
+        Arguments:
+        delay -- float, seconds to wait
+
+        Returns: float, the delay"""
+
+        return delay
+
+    def process(self, generator):
+        """Starts a generator which yields the delays it waits for.
+
+        Arguments:
+        generator -- generator run as a process"""
+
+        self.schedule(0, self.resume, generator)
+
+    def resume(self, generator):
+        """Runs a process until it waits again, or ends."""
+
+        try:
+            delay = next(generator)
+        except StopIteration:
+            return
+
+        self.schedule(delay, self.resume, generator)
+
+    def step(self):
+        """Runs the next callback."""
+
+        time, order, callback, args = heapq.heappop(self.queue)
+        self.now = time
+        self.processed += 1
+        callback(*args)
+
+    def run(self, until: float = None):
+        """Runs callbacks until the queue is empty or the given time. As in
+        SimPy, callbacks scheduled for that exact time are not run.
+
+        Arguments:
+        until -- float, time the run stops at; None runs every callback"""
+
+        queue = self.queue
+        if until is None:
+            while queue:
+                self.step()
+            return
+
+        while queue and queue[0][0] < until:
+            self.step()
+
+        self.now = until
@@ -1,8 +1,14 @@
 import networkx as nx
+import numpy
 from numpy import random
 
-def graph_configuration() -> dict[str, nx.Graph, list[dict[str, int]]]:
-    """Sets up networkx graph and some node/channel attributes."""
+def graph_configuration(rng: numpy.random.Generator = None
+                        ) -> dict[str, nx.Graph, list[dict[str, int]]]:
+    """Sets up networkx graph and some node/channel attributes.
+
+    Arguments:
+    rng -- numpy random generator for the edge channel lengths; None uses 
+           numpy.random"""
 
     G = nx.Graph()
     # List contains node ids.
@@ -13,6 +19,12 @@ def graph_configuration() -> dict[str, nx.Graph, list[dict[str, int]]]:
 
     G.add_nodes_from(nodes)
 
+    # Kind of vehicle of each node, which its data names are made from.
+    kinds = ["usv", "uuv", "uuv", "usv", "uuv", "uuv", "usv", "uuv", "uuv", 
+             "usv", "uuv", "uuv", "usv", "usv"]
+    for n in nodes:
+        G.nodes[n]["kind"] = kinds[n]
+
     # Length (in meters) is randomly chosen for edges.
     G.add_edge(0, 1, id = 1, length = 1000)
     G.add_edge(1, 2, id = 2, length = 1000)
@@ -35,7 +47,10 @@ def graph_configuration() -> dict[str, nx.Graph, list[dict[str, int]]]:
     edge_channels.append({"id": 12, "node": 9})
 
     for x in edge_channels:
-        x["length"] = random.randint(500, 2000)
+        if rng is None:
+            x["length"] = random.randint(500, 2000)
+        else:
+            x["length"] = int(rng.integers(500, 2000))
 
     # Send results back in a dictionary.
     results = {"graph": G, "edge_channels": edge_channels}
@@ -0,0 +1,302 @@
+import collections
+import heapq
+
+
+class CachePolicy(object):
+    """Base class for Content Store (CS) management policies.
+
+    A policy decides whether data passing through a node is cached
+    (admission) and which data is removed when the CS is full (eviction).
+    The CS tells the policy about every insert, hit and removal so it can
+    keep its own bookkeeping.
+
+    Arguments:
+    prob -- float, probability that admitted data is actually cached"""
+
+    def __init__(self, prob: float = 1):
+        self.prob = prob
+        self.cs = None
+        # Uniform floats in [0, 1) deciding what is cached, from the
+        # simulation the policy is bound to.
+        self.rng = None
+
+    def bind(self, cs):
+        """Attaches the policy to the CS it manages.
+
+        Arguments:
+        cs -- ContentStore object using the policy"""
+
+        self.cs = cs
+        self.rng = cs.sim.streams.uniform("caching", 0, 1)
+
+    def admit(self, data) -> bool:
+        """Decides whether data should be cached.
+
+        Arguments:
+        data -- Data object that is travelling through the node
+
+        Returns: boolean"""
+
+        return self.rng.draw() < self.prob
+
+    def on_insert(self, name: int):
+        """Called after data has been added to the CS."""
+
+    def on_hit(self, name: int):
+        """Called when an interest is satisfied from the CS."""
+
+    def on_remove(self, name: int):
+        """Called after data has been removed from the CS."""
+
+    def on_popularity(self, name: int):
+        """Called when the popularity of cached data changes at the node."""
+
+    def clear(self):
+        """Called when the whole CS is emptied."""
+
+    def victim(self) -> int:
+        """Finds the data to remove when the CS is too large.
+
+        Returns: int, name id of the data to remove"""
+
+        raise NotImplementedError
+
+
+class FIFOPolicy(CachePolicy):
+    """Removes the data that was cached first."""
+
+    def __init__(self, prob: float = 1):
+        super().__init__(prob)
+        # Keys are name ids in the order they were cached.
+        self.order = collections.OrderedDict()
+
+    def on_insert(self, name: int):
+        self.order[name] = None
+
+    def on_remove(self, name: int):
+        self.order.pop(name, None)
+
+    def clear(self):
+        self.order.clear()
+
+    def victim(self) -> int:
+        return next(iter(self.order))
+
+
+class LRUPolicy(FIFOPolicy):
+    """Removes the data that was least recently cached or requested."""
+
+    def on_hit(self, name: int):
+        self.order.move_to_end(name)
+
+
+class LFUPolicy(CachePolicy):
+    """Removes the data with the fewest hits since it was cached, the
+    least recently used first when counts are equal. The data just cached 
+    is only removed if it is the only data; it starts with the fewest hits, 
+    so it would otherwise be removed whenever the CS is full."""
+
+    def __init__(self, prob: float = 1):
+        super().__init__(prob)
+        # Dictionary with name ids as keys and hit counts as values.
+        self.counts = {}
+        # Dictionary with hit counts as keys and ordered name ids as values.
+        self.groups = {}
+        self.min_count = 0
+        # Name id of the data cached last.
+        self.newest = None
+
+    def on_insert(self, name: int):
+        self.newest = name
+        self.counts[name] = 1
+        self.groups.setdefault(1, collections.OrderedDict())[name] = None
+        self.min_count = 1
+
+    def on_hit(self, name: int):
+        count = self.counts[name]
+        self.unlink(name, count)
+        self.counts[name] = count + 1
+        self.groups.setdefault(count + 1, collections.OrderedDict())[name] = None
+
+    def on_remove(self, name: int):
+        self.unlink(name, self.counts.pop(name))
+
+    def unlink(self, name: int, count: int):
+        """Removes a name from the group of its hit count."""
+
+        group = self.groups[count]
+        del group[name]
+        if not group:
+            del self.groups[count]
+            # The smallest count is found again only if its group emptied.
+            if count == self.min_count:
+                self.min_count = min(self.groups) if self.groups else 0
+
+    def clear(self):
+        self.counts.clear()
+        self.groups.clear()
+        self.min_count = 0
+        self.newest = None
+
+    def victim(self) -> int:
+        for name in self.groups[self.min_count]:
+            if name != self.newest:
+                return name
+
+        # The newest data is alone with the fewest hits.
+        count = min((c for c in self.groups if c != self.min_count),
+                    default = None)
+        if count is None:
+            return self.newest
+        return next(iter(self.groups[count]))
+
+
+class PopularityTTLPolicy(CachePolicy):
+    """Removes the data that is the least popular and the closest to
+    expiring.
+
+    The score of data is its popularity at the node times its remaining
+    lifetime, and the data that has been cached the longest is chosen when
+    scores are equal. Candidates are kept in heaps grouped by popularity,
+    since within one popularity value the data closest to expiring always
+    has the lowest score."""
+
+    def __init__(self, prob: float = 1):
+        super().__init__(prob)
+        # Dictionary with popularity values as keys and heaps as values.
+        # Heap items are (expire_time, order, name id); stale items are skipped.
+        self.buckets = {}
+        # Number of heap items across all buckets, used to trigger compaction.
+        self.heap_items = 0
+
+    def on_insert(self, name: int):
+        self.push(name)
+
+    def on_popularity(self, name: int):
+        # The old heap item becomes stale once the popularity has changed.
+        self.push(name)
+
+    def clear(self):
+        self.buckets = {}
+        self.heap_items = 0
+
+    def key(self, name: int) -> tuple:
+        """Builds the heap item and bucket for cached data."""
+
+        data, order = self.cs.entries[name]
+        pop = self.cs.popularity.get(name, 0)
+        # All data with a popularity of 0 has a score of 0, so only the
+        # order decides between them.
+        key = data.expire_time if pop > 0 else 0
+        return pop, (key, order, name)
+
+    def push(self, name: int):
+        """Pushes a heap item for cached data into its popularity bucket."""
+
+        pop, item = self.key(name)
+        heapq.heappush(self.buckets.setdefault(pop, []), item)
+        self.heap_items += 1
+
+        # Rebuild the heaps once stale items outnumber live ones.
+        if self.heap_items > 2*len(self.cs.entries) + 64:
+            self.compact()
+
+    def compact(self):
+        """Rebuilds the popularity buckets from the cached data."""
+
+        self.clear()
+        for n in self.cs.entries:
+            pop, item = self.key(n)
+            self.buckets.setdefault(pop, []).append(item)
+            self.heap_items += 1
+
+        for b in self.buckets.values():
+            heapq.heapify(b)
+
+    def victim(self) -> int:
+        entries = self.cs.entries
+        popularity = self.cs.popularity
+        now = self.cs.env.now
+
+        best = None
+        for pop in list(self.buckets):
+            heap = self.buckets[pop]
+            # Throw away stale items at the top of the heap.
+            while heap:
+                key, order, name = heap[0]
+                entry = entries.get(name)
+                if (entry is not None and entry[1] == order
+                        and popularity.get(name, 0) == pop):
+                    break
+                heapq.heappop(heap)
+                self.heap_items -= 1
+
+            if not heap:
+                del self.buckets[pop]
+                continue
+
+            key, order, name = heap[0]
+            score = pop*(entries[name][0].expire_time - now)
+            if best is None or (score, order) < best[:2]:
+                best = (score, order, name)
+
+        return best[2]
+
+
+class LCDPolicy(LRUPolicy):
+    """Leave Copy Down: data is only cached by the node one hop below
+    the node that responded with it, and removed in LRU order."""
+
+    def admit(self, data) -> bool:
+        return data.hops == 1
+
+
+class ProbCachePolicy(LRUPolicy):
+    """ProbCache: data is cached with a probability that grows as it gets
+    closer to the requester and with the room left on the path, and is
+    removed in LRU order. CSs along the path are assumed to be the same size.
+
+    Arguments:
+    prob -- float, unused; kept so all policies are built the same way
+    tw -- float, target time window (T_tw) from the ProbCache paper"""
+
+    def __init__(self, prob: float = 1, tw: float = 10):
+        super().__init__(prob)
+        self.tw = tw
+
+    def admit(self, data) -> bool:
+        # c is the path length and x the distance from the responder.
+        c = data.path_length
+        x = data.hops
+        if c <= 0:
+            return False
+
+        times_in = (c - x + 1)/self.tw
+        weight = x/c
+        return self.rng.draw() < times_in*weight
+
+
+# Policies which can be chosen by name.
+POLICIES = {
+    "fifo": FIFOPolicy,
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy,
+    "popularity_ttl": PopularityTTLPolicy,
+    "lcd": LCDPolicy,
+    "probcache": ProbCachePolicy,
+}
+
+
+def create_policy(name: str, prob: float = 1) -> CachePolicy:
+    """Creates a new policy object; each CS needs its own.
+
+    Arguments:
+    name -- String, key of the policy in POLICIES
+    prob -- float, probability that admitted data is cached
+
+    Returns: CachePolicy"""
+
+    if name not in POLICIES:
+        raise ValueError("Unknown cache policy: %s" % name)
+
+    return POLICIES[name](prob)
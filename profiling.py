@@ -0,0 +1,167 @@
+import functools
+import logging
+import time
+import simpy
+import kernel
+import policies
+import simulation
+
+# Methods timed by a Profiler, as (class, method name). The victim methods
+# of the cache policies are added from policies.POLICIES.
+TARGETS = [(simulation.Node, "receive_request"),
+           (simulation.Node, "receive_data"),
+           (simulation.ContentStore, "search"),
+           (simulation.ContentStore, "cache_data"),
+           (simulation.ContentStore, "insert"),
+           (simulation.ContentStore, "remove"),
+           (simulation.ContentStore, "expire"),
+           (simulation.PendingInterest, "search"),
+           (simulation.PendingInterest, "add_name"),
+           (simulation.PendingInterest, "add_interface"),
+           (simulation.PendingInterest, "remove"),
+           (simulation.ForwardingBase, "lookup"),
+           (simulation.Channel, "forward_interest"),
+           (simulation.Channel, "forward_data"),
+           (simulation.Channel, "delay"),
+           (simulation.Link, "deliver"),
+           (simulation.HeapLink, "deliver")]
+
+
+class Profiler(object):
+    """Counts and times calls to the main parts of the simulation, and
+    counts the events processed by either engine.
+
+    The methods are only wrapped between install and uninstall (or inside
+    a with block), so nothing is slowed down when profiling is off. Only
+    samples run in the current process are measured, so runs should use
+    one worker.
+
+    Arguments:
+    targets -- list of (class, method name) to time; None uses TARGETS and
+               the victim methods of every policy"""
+
+    def __init__(self, targets: list[tuple] = None):
+        if targets is None:
+            targets = list(TARGETS)
+            for cls in set(policies.POLICIES.values()):
+                if "victim" in cls.__dict__:
+                    targets.append((cls, "victim"))
+
+        self.targets = targets
+        # Dictionary with labels as keys and [calls, total, self time] as values.
+        self.stats = {}
+        # Dictionary with folded stacks as keys and self time as values.
+        self.folded = {}
+        # Labels of the calls in progress, and the time spent in their
+        # timed callees so far.
+        self.stack = []
+        self.children = []
+        self.events = 0
+        self.wall_time = 0.0
+        self.originals = []
+        self.started = None
+
+    def __enter__(self) -> "Profiler":
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def install(self):
+        """Wraps the target methods and the step of both engines."""
+
+        for cls, name in self.targets:
+            self.wrap(cls, name, "%s.%s" % (cls.__name__, name))
+        self.wrap(simpy.Environment, "step", "simpy.step", count = True)
+        self.wrap(kernel.EventQueue, "step", "kernel.step", count = True)
+        self.started = time.perf_counter()
+
+    def uninstall(self):
+        """Puts the original methods back."""
+
+        self.wall_time += time.perf_counter() - self.started
+        for cls, name, original in reversed(self.originals):
+            setattr(cls, name, original)
+        self.originals = []
+
+    def wrap(self, cls, name: str, label: str, count: bool = False):
+        """Replaces a method by one which times it.
+
+        Arguments:
+        cls -- class the method belongs to
+        name -- String, name of the method
+        label -- String, name of the method in the report
+        count -- boolean, whether calls count as processed events"""
+
+        original = getattr(cls, name)
+        self.originals.append((cls, name, original))
+        stats = self.stats.setdefault(label, [0, 0.0, 0.0])
+        stack = self.stack
+        children = self.children
+        folded = self.folded
+        clock = time.perf_counter
+        profiler = self
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            stack.append(label)
+            children.append(0.0)
+            start = clock()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - children.pop()
+                key = ";".join(stack)
+                folded[key] = folded.get(key, 0.0) + own
+                stack.pop()
+                if children:
+                    children[-1] += elapsed
+
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += own
+                if count:
+                    profiler.events += 1
+
+        setattr(cls, name, timed)
+
+    def table(self) -> str:
+        """Creates the summary table, slowest parts (by self time) first.
+
+        Returns: String"""
+
+        wall = self.wall_time or 1e-12
+        lines = ["%-34s %10s %10s %10s %7s %10s" % ("function", "calls",
+                 "total s", "self s", "self %", "us/call")]
+        for label, (calls, total, own) in sorted(self.stats.items(),
+                                                  key = lambda x: -x[1][2]):
+            if calls:
+                lines.append("%-34s %10d %10.3f %10.3f %7.1f %10.2f" % (
+                    label, calls, total, own, 100*own/wall, 1e6*total/calls))
+
+        lines.append("Events processed: %s in %.3f s of wall time (%.0f events/s)"
+                     % (self.events, self.wall_time, self.events/wall))
+        return "\n".join(lines)
+
+    def write_folded(self, path: str):
+        """Writes the folded stacks, with self time in microseconds, in the
+        input format of flamegraph.pl and speedscope.
+
+        Arguments:
+        path -- String, path of the file"""
+
+        with open(path, "w") as f:
+            for key, own in sorted(self.folded.items()):
+                f.write("%s %d\n" % (key, round(own*1e6)))
+
+    def report(self, path: str = None):
+        """Logs the summary table and writes the folded stacks.
+
+        Arguments:
+        path -- String, path of the folded stacks; None writes none"""
+
+        logging.info("Profile:\n%s", self.table())
+        if path is not None:
+            self.write_folded(path)
@@ -0,0 +1,79 @@
+import forwarding
+
+
+class NameRegistry(object):
+    """Gives every data name an int id once, so the CS, PIT, FIB and
+    popularity tables can be indexed by ints instead of strings. The
+    attributes of each name are worked out when it is added and kept in
+    lists indexed by id.
+
+    Arguments:
+    hi_expire_time -- float, health information expire time in seconds
+    mi_expire_time -- float, mission information expire time in seconds"""
+
+    def __init__(self, hi_expire_time: float, mi_expire_time: float):
+        self.hi_expire_time = hi_expire_time
+        self.mi_expire_time = mi_expire_time
+
+        # Dictionary with data names as keys and ids as values.
+        self.ids = {}
+        # Lists indexed by id.
+        self.names = []
+        self.components = []
+        self.producers = []
+        self.health = []
+        self.lifetimes = []
+        # Dictionary with node ids as keys and lists of name ids as values.
+        self.by_producer = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_node_names(cls, node_names: list[list[str]],
+                        hi_expire_time: float,
+                        mi_expire_time: float) -> "NameRegistry":
+        """Creates a registry from lists of data names ordered by node id.
+
+        Arguments:
+        node_names -- 2D list with a list of data names for each node
+        hi_expire_time -- float, health information expire time in seconds
+        mi_expire_time -- float, mission information expire time in seconds
+
+        Returns: NameRegistry"""
+
+        registry = cls(hi_expire_time, mi_expire_time)
+        for node_id in range(0, len(node_names)):
+            for name in node_names[node_id]:
+                registry.intern(name, node_id)
+
+        return registry
+
+    def intern(self, name: str, producer: int) -> int:
+        """Adds a name if it is new and returns its id.
+
+        Arguments:
+        name -- String, the data name
+        producer -- int, id of the node which produces the data
+
+        Returns: int"""
+
+        if name in self.ids:
+            return self.ids[name]
+
+        name_id = len(self.names)
+        self.ids[name] = name_id
+        self.names.append(name)
+        self.components.append(forwarding.components(name))
+        self.producers.append(producer)
+
+        # The time the data expires is determined based on importance.
+        health = "health_info" in name
+        self.health.append(health)
+        if health:
+            self.lifetimes.append(self.hi_expire_time)
+        else:
+            self.lifetimes.append(self.mi_expire_time)
+
+        self.by_producer.setdefault(producer, []).append(name_id)
+        return name_id
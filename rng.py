@@ -0,0 +1,106 @@
+import random
+import zlib
+import numpy
+
+
+class UniformBatch(object):
+    """Hands out uniform random floats one at a time from values drawn in
+    batches by a NumPy generator.
+
+    Arguments:
+    generator -- numpy random generator the values are drawn from
+    low -- float, lower bound of the values
+    high -- float, upper bound of the values
+    size -- int, number of values drawn at a time"""
+
+    def __init__(self, generator: numpy.random.Generator, low: float,
+                 high: float, size: int = 4096):
+        self.generator = generator
+        self.low = low
+        self.high = high
+        self.size = size
+        self.values = iter(())
+
+    def draw(self) -> float:
+        try:
+            return next(self.values)
+        except StopIteration:
+            self.values = iter(self.generator.uniform(self.low, self.high,
+                                                      self.size).tolist())
+            return next(self.values)
+
+
+class RngRegistry(object):
+    """Independent random streams for the components of a simulation, all
+    derived from one seed. Each stream is identified by a name such as
+    "workload" or "links", so a stream gives the same values whatever other
+    streams are used, and in whatever order they are created.
+
+    Arguments:
+    seed -- int, seed of the registry; None picks a random one"""
+
+    def __init__(self, seed: int = None):
+        self.root = numpy.random.SeedSequence(seed)
+        self.generators = {}
+        self.randoms = {}
+        self.batches = {}
+
+    def sequence(self, name: str) -> numpy.random.SeedSequence:
+        """Derives the seed sequence of a stream from its name.
+
+        Arguments:
+        name -- String, name of the stream
+
+        Returns: numpy SeedSequence"""
+
+        # crc32 gives the same key in every process, unlike hash.
+        return numpy.random.SeedSequence(
+            self.root.entropy,
+            spawn_key = self.root.spawn_key + (zlib.crc32(name.encode()),))
+
+    def generator(self, name: str) -> numpy.random.Generator:
+        """NumPy generator of a stream, for drawing values in batches.
+
+        Arguments:
+        name -- String, name of the stream
+
+        Returns: numpy Generator"""
+
+        if name not in self.generators:
+            self.generators[name] = numpy.random.default_rng(
+                self.sequence(name))
+
+        return self.generators[name]
+
+    def random(self, name: str) -> random.Random:
+        """random.Random object of a stream, for drawing single values.
+
+        Arguments:
+        name -- String, name of the stream
+
+        Returns: random.Random"""
+
+        if name not in self.randoms:
+            # The stream of the generator is not reused, so a different key
+            # is used for the Random object of the same name.
+            state = self.sequence(name + "/random").generate_state(4)
+            self.randoms[name] = random.Random(
+                int.from_bytes(state.tobytes(), "little"))
+
+        return self.randoms[name]
+
+    def uniform(self, name: str, low: float, high: float) -> UniformBatch:
+        """Batched uniform floats of a stream, for hot paths which need one
+        value at a time.
+
+        Arguments:
+        name -- String, name of the stream
+        low -- float, lower bound of the values
+        high -- float, upper bound of the values
+
+        Returns: UniformBatch"""
+
+        if name not in self.batches:
+            self.batches[name] = UniformBatch(self.generator(name), low, high)
+
+        return self.batches[name]
@@ -0,0 +1,200 @@
+import concurrent.futures
+import logging
+import math
+import os
+import numpy
+import simulation
+import stats
+
+# Results with a count for every node, which are added up across samples.
+COUNTS = ("cache_hits", "total_requests", "pit_aggregations", "pit_expired",
+          "pit_dropped", "unsolicited_data", "unrouted")
+
+
+def sample_seeds(samples: int, seed: int = None) -> list[int]:
+    """Derives an independent seed for every sample from one seed, so
+    results do not depend on how samples are split between workers.
+
+    Arguments:
+    samples -- int, number of samples
+    seed -- int, the seed of the whole run; None picks a random one
+
+    Returns: list of ints"""
+
+    sequence = numpy.random.SeedSequence(seed)
+    logging.info("Seed of run: %s", sequence.entropy)
+    # Seeds of 128 bits, since with 32 two of many samples could well get 
+    # the same streams.
+    return [int.from_bytes(s.generate_state(4).tobytes(), "little")
+            for s in sequence.spawn(samples)]
+
+
+def merge(results: list[dict]) -> dict:
+    """Merges the results of samples (or of already merged chunks) in order.
+
+    Arguments:
+    results -- list of result dictionaries from Simulation.run_sample
+
+    Returns: dictionary of merged results"""
+
+    merged = {"samples": 0, "metrics": stats.Metrics(), 
+              "links": stats.LinkMetrics()}
+    for key in COUNTS:
+        merged[key] = []
+
+    for r in results:
+        merged["samples"] += r["samples"]
+        merged["metrics"].merge(r["metrics"])
+        merged["links"].merge(r["links"])
+
+        # Counts of each node are added up across samples.
+        for key in COUNTS:
+            if not merged[key]:
+                merged[key] = [0]*len(r[key])
+            for i in range(0, len(r[key])):
+                merged[key][i] += r[key][i]
+
+    return merged
+
+
+def run_chunk(seeds: list[int], config: dict = None) -> dict:
+    """Runs samples one after another in the current process.
+
+    Arguments:
+    seeds -- list of ints, one seed for each sample
+    config -- dictionary of arguments for simulation.Simulation
+
+    Returns: dictionary of merged results"""
+
+    sim = simulation.Simulation(**(config or {}))
+    return merge([sim.run_sample(s) for s in seeds])
+
+
+def run(samples: int, seed: int = None, workers: int = None,
+        chunksize: int = None, config: dict = None, precision: float = None,
+        check_samples: int = 100) -> dict:
+    """Runs independent samples spread across a pool of processes.
+
+    Arguments:
+    samples -- int, number of samples to run, at most with a precision
+    seed -- int, the seed of the whole run; None picks a random one
+    workers -- int, number of processes; None uses every core
+    chunksize -- int, number of samples given to a process at a time
+    config -- dictionary of arguments for simulation.Simulation
+    precision -- float, largest half width of the confidence intervals of
+                 the mean hit distance and return time across samples,
+                 relative to the means; None runs every sample
+    check_samples -- int, number of samples run between checks of the
+                     confidence intervals
+
+    Returns: dictionary of merged results, in sample order"""
+
+    seeds = sample_seeds(samples, seed)
+
+    if precision is None:
+        return run_seeds(seeds, workers, chunksize, config)
+
+    # Checks are made after the same samples whatever the number of
+    # workers, so the run stops at the same point.
+    merged = merge([])
+    for i in range(0, samples, check_samples):
+        merged = merge([merged, run_seeds(seeds[i:i + check_samples],
+                                          workers, chunksize, config)])
+        if converged(merged, precision):
+            logging.info("Run converged after %s samples", merged["samples"])
+            break
+
+    return merged
+
+
+def converged(results: dict, precision: float,
+              confidence: float = 0.95) -> bool:
+    """Whether the confidence intervals of the mean hit distance and return
+    time across samples are within precision of the means.
+
+    Arguments:
+    results -- dictionary of merged results
+    precision -- float, largest half width relative to the means
+    confidence -- float, confidence level of the intervals
+
+    Returns: boolean"""
+
+    metrics = results["metrics"]
+    for averages in (metrics.hd_samples, metrics.rt_samples):
+        if averages.half_width(confidence) > precision*abs(averages.mean):
+            return False
+
+    return True
+
+
+def run_seeds(seeds: list[int], workers: int = None, chunksize: int = None,
+              config: dict = None) -> dict:
+    """Runs the samples of the given seeds spread across a pool of processes.
+
+    Arguments:
+    seeds -- list of ints, one seed for each sample
+    workers -- int, number of processes; None uses every core
+    chunksize -- int, number of samples given to a process at a time
+    config -- dictionary of arguments for simulation.Simulation
+
+    Returns: dictionary of merged results, in sample order"""
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # A few chunks per worker keeps all of them busy until the end.
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(seeds)/(workers*4)))
+
+    chunks = []
+    for i in range(0, len(seeds), chunksize):
+        chunks.append(seeds[i:i + chunksize])
+
+    # Without extra workers there is no need to start a pool.
+    if workers == 1:
+        return merge([run_chunk(c, config) for c in chunks])
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+        # map returns results in the order of the chunks.
+        return merge(list(executor.map(run_chunk, chunks, 
+                                       [config]*len(chunks))))
+
+
+def validate_engine(samples: int = 1, seed: int = None, config: dict = None,
+                    tolerance: float = 1e-9) -> dict:
+    """Runs the same samples with the SimPy and the heap engine, and
+    compares the summaries of their results.
+
+    Arguments:
+    samples -- int, number of samples to run with each engine
+    seed -- int, the seed of the whole run; None picks a random one
+    config -- dictionary of arguments for simulation.Simulation
+    tolerance -- float, largest relative difference allowed for a metric
+
+    Returns: dictionary with the metrics which differ as keys and
+             (SimPy value, heap value) as values; empty if all match"""
+
+    # Both engines must run the same seeds.
+    if seed is None:
+        seed = numpy.random.SeedSequence().entropy
+
+    summaries = {}
+    for engine in ("simpy", "heap"):
+        engine_config = dict(config or {}, engine = engine)
+        summaries[engine] = simulation.summarize(
+            run(samples, seed = seed, workers = 1, config = engine_config))
+
+    differences = {}
+    for key, expected in summaries["simpy"].items():
+        value = summaries["heap"][key]
+        if not math.isclose(value, expected, rel_tol = tolerance,
+                            abs_tol = tolerance):
+            differences[key] = (expected, value)
+
+    if differences:
+        logging.warning("Engines differ in %s metrics: %s", len(differences),
+                        differences)
+    else:
+        logging.info("Engines match in all %s metrics", len(summaries["heap"]))
+
+    return differences
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import logging
+import os
+import networkx as nx
+import numpy
+import forwarding
+import simulation
+
+# YAML scenarios need PyYAML; JSON and GraphML work without it.
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# Changing the compiled form means old caches must be compiled again.
+FORMAT_VERSION = 1
+
+
+def check_channel_ids(G: nx.Graph, edge_channels: list[dict]):
+    """Checks that the channels and edge channels of a scenario together 
+    have ids running from 0 without gaps or repeats, since the simulation 
+    finds channels by id.
+
+    Arguments:
+    G -- networkx graph whose edges have an id
+    edge_channels -- list of edge channel dictionaries with an id"""
+
+    ids = sorted([G.edges[e]["id"] for e in G.edges]
+                 + [e["id"] for e in edge_channels])
+    for expected, channel_id in enumerate(ids):
+        if channel_id < expected:
+            raise ValueError("Channel id %s is used more than once" 
+                             % channel_id)
+        if channel_id > expected:
+            raise ValueError("Channel id %s is out of range, channel ids must "
+                             "run from 0 without gaps but %s is missing" 
+                             % (channel_id, expected))
+
+
+def check_names(names: list[list[str]]):
+    """Checks that the FIBs built from a scenario can route every name to 
+    the node which has it. Each node's prefix is the longest common prefix 
+    of its names, see forwarding.common_prefix, so the names of a node must 
+    share one and no other node's prefix may match them better.
+
+    Arguments:
+    names -- 2D list with a list of data names for each node"""
+
+    # Node of each producer prefix.
+    owners = {}
+    for n in range(0, len(names)):
+        prefix = forwarding.common_prefix(names[n])
+        if not prefix:
+            raise ValueError("Names of node %s share no prefix to route them "
+                             "by: %s" % (n, names[n]))
+        if prefix in owners:
+            raise ValueError("Nodes %s and %s both have the prefix %s"
+                             % (owners[prefix], n, prefix))
+        owners[prefix] = n
+
+    trie = forwarding.NameTrie.from_prefixes(owners)
+    for n in range(0, len(names)):
+        for name in names[n]:
+            owner = trie.longest_match(forwarding.components(name))
+            if owner != n:
+                raise ValueError("Name %s of node %s would be routed to node "
+                                 "%s" % (name, n, owner))
+
+
+def read(path: str) -> dict:
+    """Reads a scenario from a JSON, YAML or GraphML file.
+
+    JSON and YAML scenarios have a list of "nodes" (with "id", "kind" and
+    optionally "names"), a list of "channels" (with "id", "nodes" and
+    "length") and a list of "edge_channels" (with "id", "node" and
+    "length"). In GraphML, nodes have "kind" and optionally "names" (one
+    string separated by spaces), edges have "id" and "length", and a node
+    with an "edge_channel" id has an edge channel of "edge_length" meters.
+    If only some nodes have names, the others are named from their kind as 
+    in simulation.graph_names. Channel ids must run from 0 without gaps, 
+    and names must be routable, see check_names.
+
+    Arguments:
+    path -- String, path of the scenario file
+
+    Returns: dictionary with the graph, edge channels and names (or None)"""
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".graphml":
+        G = nx.read_graphml(path, node_type = int)
+        edge_channels = []
+        named = False
+        for n in G.nodes:
+            attributes = G.nodes[n]
+            if "edge_channel" in attributes:
+                edge_channels.append({"id": int(attributes.pop("edge_channel")),
+                                      "node": n,
+                                      "length": attributes.pop("edge_length")})
+            if "names" in attributes:
+                attributes["names"] = attributes["names"].split()
+                named = True
+
+        for e in G.edges:
+            G.edges[e]["id"] = int(G.edges[e]["id"])
+        check_channel_ids(G, edge_channels)
+
+        names = None
+        if named:
+            kind_names = simulation.graph_names(G)
+            names = [G.nodes[n].get("names") or kind_names[n]
+                     for n in range(0, len(G))]
+            check_names(names)
+        return {"graph": G, "edge_channels": edge_channels, "names": names}
+
+    with open(path) as f:
+        if extension in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError("PyYAML is needed to read %s" % path)
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+
+    G = nx.Graph()
+    for node in spec["nodes"]:
+        G.add_node(node["id"], kind = node.get("kind", "uuv"))
+    for c in spec["channels"]:
+        G.add_edge(c["nodes"][0], c["nodes"][1], id = c["id"],
+                   length = c["length"])
+
+    edge_channels = spec.get("edge_channels", [])
+    check_channel_ids(G, edge_channels)
+
+    # Nodes without names of their own are named from their kind.
+    names = None
+    if any("names" in node for node in spec["nodes"]):
+        names = simulation.graph_names(G)
+        for node in spec["nodes"]:
+            if node.get("names"):
+                names[node["id"]] = node["names"]
+        check_names(names)
+
+    return {"graph": G, "edge_channels": edge_channels, "names": names}
+
+
+def write(path: str, topology: dict, names: list[list[str]] = None):
+    """Writes a network, e.g. from topology.py, as a JSON scenario.
+
+    Arguments:
+    path -- String, path of the JSON file
+    topology -- dictionary with the graph and edge channels of the network
+    names -- 2D list with a list of data names for each node; None leaves
+             them to be made from the kind of each node"""
+
+    G = topology["graph"]
+    nodes = []
+    for n in sorted(G.nodes):
+        node = {"id": n, "kind": G.nodes[n].get("kind", "uuv")}
+        if names is not None:
+            node["names"] = names[n]
+        nodes.append(node)
+
+    channels = []
+    for u, v in G.edges:
+        channels.append({"id": G.edges[u, v]["id"], "nodes": [u, v],
+                         "length": G.edges[u, v]["length"]})
+    channels.sort(key = lambda c: c["id"])
+
+    with open(path, "w") as f:
+        json.dump({"nodes": nodes, "channels": channels,
+                   "edge_channels": topology["edge_channels"]}, f, indent = 1)
+
+
+def compile_arrays(spec: dict) -> dict[str, numpy.ndarray]:
+    """Turns a scenario into arrays: the channels, the data names of every
+    node and the channel each node forwards to for each producer.
+
+    Arguments:
+    spec -- dictionary from read
+
+    Returns: dictionary of array names and numpy arrays"""
+
+    G = spec["graph"]
+    nodes = len(G)
+    names = spec["names"] or simulation.graph_names(G)
+
+    # Rows are (node, node, channel id) and (channel id, node), with the
+    # lengths in separate arrays since they may be floats.
+    edges = numpy.array([(u, v, G.edges[u, v]["id"]) for u, v in G.edges],
+                        numpy.int64).reshape(-1, 3)
+    lengths = numpy.array([G.edges[u, v]["length"] for u, v in G.edges],
+                          numpy.float64)
+    edge_channels = numpy.array([(e["id"], e["node"])
+                                 for e in spec["edge_channels"]],
+                                numpy.int64).reshape(-1, 2)
+    edge_lengths = numpy.array([e["length"] for e in spec["edge_channels"]],
+                               numpy.float64)
+
+    # Names of all nodes in one array, with the start of each node's names.
+    offsets = numpy.zeros(nodes + 1, numpy.int64)
+    offsets[1:] = numpy.cumsum([len(x) for x in names])
+    flat = numpy.array([x for node_names in names for x in node_names], str)
+
+    # fib[n, p] is the channel node n forwards to for producer p, -1 for
+    # the producer itself.
+    fib = numpy.full((nodes, nodes), -1, numpy.int32)
+    channels = forwarding.next_channels(G, list(range(0, nodes)), "length")
+    fib[list(G.nodes)] = channels.T
+
+    return {"kinds": numpy.array([G.nodes[n].get("kind", "uuv")
+                                  for n in range(0, nodes)], str),
+            "edges": edges, "lengths": lengths,
+            "edge_channels": edge_channels, "edge_lengths": edge_lengths,
+            "names": flat, "name_offsets": offsets, "fib": fib}
+
+
+def source_key(path: str) -> str:
+    """Hash of a scenario file and the compiled format, so a cache is only
+    used for the file it was compiled from."""
+
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def load(path: str, cache: str = None) -> dict:
+    """Loads a scenario, compiling it into a binary cache the first time
+    and reading the cache on later runs.
+
+    Arguments:
+    path -- String, path of the scenario file
+    cache -- String, path of the cache; None puts it next to the file
+
+    Returns: dictionary with the "topology", "names" and "fib" arguments of
+             simulation.Simulation"""
+
+    cache = cache or path + ".npz"
+    key = source_key(path)
+
+    if os.path.exists(cache):
+        with numpy.load(cache) as arrays:
+            if str(arrays["key"]) == key:
+                return unpack(arrays)
+
+    logging.info("Compiling scenario %s", path)
+    arrays = compile_arrays(read(path))
+    # Other processes may be loading the same scenario, so the cache is 
+    # written to a file of this process and only then moved into place.
+    partial = "%s.%s.tmp" % (cache, os.getpid())
+    with open(partial, "wb") as f:
+        numpy.savez(f, key = numpy.array(key), **arrays)
+    os.replace(partial, cache)
+    return unpack(arrays)
+
+
+def unpack(arrays) -> dict:
+    """Builds the arguments of simulation.Simulation from compiled arrays.
+
+    Arguments:
+    arrays -- dictionary of array names and numpy arrays, from compile_arrays
+
+    Returns: dictionary with the "topology", "names" and "fib" arguments"""
+
+    kinds = arrays["kinds"].tolist()
+    G = nx.Graph()
+    for n in range(0, len(kinds)):
+        G.add_node(n, kind = kinds[n])
+    for (u, v, channel_id), length in zip(arrays["edges"].tolist(),
+                                          arrays["lengths"].tolist()):
+        G.add_edge(u, v, id = channel_id, length = length)
+
+    edge_channels = [{"id": i, "node": n, "length": length}
+                     for (i, n), length in zip(arrays["edge_channels"].tolist(),
+                                               arrays["edge_lengths"].tolist())]
+
+    flat = arrays["names"].tolist()
+    offsets = arrays["name_offsets"].tolist()
+    names = [flat[offsets[n]:offsets[n + 1]] for n in range(0, len(kinds))]
+
+    # Each node's FIB has the prefix of every other producer.
+    prefixes = [forwarding.common_prefix(x) for x in names]
+    fib = []
+    table = arrays["fib"]
+    for n in range(0, len(kinds)):
+        row = table[n]
+        fib.append({prefixes[p]: int(row[p])
+                    for p in numpy.flatnonzero(row >= 0).tolist()})
+
+    return {"topology": {"graph": G, "edge_channels": edge_channels},
+            "names": names, "fib": fib}
@@ -6,11 +6,20 @@ import matplotlib
 import matplotlib.pyplot as plt
 import seaborn
 import logging
-import statistics
 import pylint
 import network
 import csv
 import datetime
+import heapq
+import math
+import collections
+import policies
+import stats
+import registry
+import forwarding
+import workloads
+import rng
+import kernel
 
 logging.basicConfig(level = logging.INFO)
 
@@ -19,6 +28,11 @@ logging.basicConfig(level = logging.INFO)
 # Probability that data will be cached when caching through the CS.
 PROB = 1
 
+# CS management policy of every node, one of the names in policies.POLICIES.
+POLICY = "popularity_ttl"
+# Policies for specific nodes, with node ids as keys and names as values.
+NODE_POLICIES = {}
+
 # Max size of a CS. 
 CACHE_SIZE = 5
 
@@ -27,6 +41,29 @@ BANDWIDTH = 100000000
 SIGNAL_SPEED = 1500
 # Range for random negative or positive variance in delay.
 DELAY_VARIANCE = 0.5
+# Max number of packets waiting in each direction of a channel, packets 
+# arriving at a full queue are dropped; None has no limit.
+LINK_BUFFER = None
+
+# Seconds an interest waits in a PIT for its data before it expires.
+INTEREST_LIFETIME = 60
+# Max number of entries in a PIT, new interests are dropped when it is 
+# full; None has no limit.
+PIT_SIZE = None
+# Seconds between the ticks at which PIT entries expire.
+PIT_TICK = 1
+# Whether data which is no longer used is reused for new data, which saves 
+# allocations on long runs, see DataPool.
+POOL_PACKETS = False
+# Engine running the events of a sample: "simpy", or "heap" for the 
+# lighter event queue of kernel.py, which gives the same results.
+ENGINE = "simpy"
+# Whether a run first checks that both engines give the same results on a 
+# few samples, see runner.validate_engine.
+VALIDATE_ENGINE = False
+# Node of the original network (network.py) whose data the original 
+# workload requests more often; other networks have no such node.
+HOT_NODE = 13
 
 # Data expires at different times depending on the importance.
 # Health information expire time in seconds.
@@ -36,64 +73,275 @@ MI_EXPIRE_TIME = 30
 
 SAMPLES = 10000
 RUN_TIME = 1000
+# Seconds at the start of each sample which are left out of the results, 
+# while the pre-filled CSs and empty links settle.
+WARM_UP = 0
+# With a precision, each sample leaves out its start-up transient (found 
+# with MSER-5) and stops once the confidence intervals of its mean hit 
+# distance and return time are within PRECISION of the means; the run 
+# stops once the intervals across samples are. None runs every sample for 
+# RUN_TIME and runs all SAMPLES.
+PRECISION = None
+# Simulated seconds between the checks of a sample's confidence intervals.
+CHECK_INTERVAL = 50
+
+# Seed used to derive the seed of every sample; None picks a random one.
+SEED = None
+# Number of processes samples are spread across; None uses every core.
+WORKERS = None
+# Whether the run is profiled, in one process, see profiling.py.
+PROFILE = False
+# File the folded stacks of a profiled run are written to.
+PROFILE_OUTPUT = "profile.folded"
 
 
 class Interest(object):
     """Represents an interest package and its attributes.
+
+    Packets only have slots, so millions of them take less memory and are 
+    quicker to create than objects with a __dict__.
     
     Arguments:
-    env -- Simpy env in which the simulation takes place
     id -- int, the id the interest is assigned to
-    name -- String, name of data interest is requesting"""
+    name_id -- int, id of the name of the data requested
+    creation_time -- float, simulation time the interest was sent at
+    lifetime -- float, seconds a PIT keeps the interest waiting for data"""
 
-    def __init__(self, env: simpy.Environment, id: int, name: str):
-        self.env = env
+    __slots__ = ("id", "name_id", "lifetime", "creation_time", "size", "hops")
+
+    def __init__(self, id: int, name_id: int, creation_time: float, 
+                 lifetime: float = None):
         self.id = id
-        self.data_name = name
-        self.creation_time = self.env.now
+        self.name_id = name_id
+        self.lifetime = INTEREST_LIFETIME if lifetime is None else lifetime
+        self.creation_time = creation_time
         # Currently all interest packets are the same size.
         self.size = 1000
+        # Number of nodes the interest has passed through.
+        self.hops = 0
 
 
 class Data(object):
     """Represents a data package and its attributes.
     
     Arguments:
-    env -- Simpy env in which the simulation takes place
-    id -- int, the id the data is assigned to
-    name -- String, name of data being packaged"""
+    name_id -- int, id of the name of the data being packaged
+    send_time -- float, simulation time the data was sent at
+    lifetime -- float, seconds until the data expires
+    size -- float, size of the data, see Simulation.data_size"""
 
-    def __init__(self, env: simpy.Environment, name: str):
-        self.env = env
-        self.name = name
-        # Size of data is variable.
-        self.size = 2000 + random.uniform(-200, 200)
+    __slots__ = ("name_id", "size", "send_time", "hops", "path_length", 
+                 "expire_time", "refs")
+
+    def __init__(self, name_id: int, send_time: float, lifetime: float, 
+                 size: float):
+        self.reset(name_id, send_time, lifetime, size)
+
+    def reset(self, name_id: int, send_time: float, lifetime: float, 
+              size: float):
+        """Sets every attribute, as if the data had just been created.
+
+        Arguments:
+        name_id -- int, id of the name of the data being packaged
+        send_time -- float, simulation time the data was sent at
+        lifetime -- float, seconds until the data expires
+        size -- float, size of the data"""
+
+        self.name_id = name_id
+        self.size = size
+
+        self.send_time = send_time
+        # Nodes the data has passed through since it was sent, and the 
+        # number of hops between the requester and the responder.
+        self.hops = 0
+        self.path_length = 0
+        self.expire_time = send_time + lifetime
+        # Number of holders of the data, see DataPool.
+        self.refs = 1
+
+
+class DataPool(object):
+    """Creates Data objects, reusing those which are no longer used when 
+    pooling is enabled.
+
+    A data is held once while it travels and once by every CS caching it. 
+    Its trip ends when it reaches the user, is dropped by a full link or is 
+    dropped as unsolicited; once it is neither travelling nor cached it 
+    goes back to the pool. Interests are not pooled: an interest can still 
+    be queued on a link when data for its name reaches the user, so there 
+    is no point where it is known to be unused.
+
+    Arguments:
+    enabled -- boolean, whether released data is reused"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.free = []
+        self.created = 0
+        self.reused = 0
 
-        self.send_time = self.env.now
-        # The time the data expires is determined based on importance.
-        if "health_info" in self.name:
-            self.expire_time = self.send_time + HI_EXPIRE_TIME
+    def new(self, name_id: int, send_time: float, lifetime: float, 
+            size: float, refs: int = 1) -> Data:
+        """Creates data, reusing a released data if there is one.
 
+        Arguments:
+        name_id -- int, id of the name of the data being packaged
+        send_time -- float, simulation time the data was sent at
+        lifetime -- float, seconds until the data expires
+        size -- float, size of the data
+        refs -- int, 1 for data which is sent, 0 for data which is not
+
+        Returns: Data"""
+
+        if self.free:
+            data = self.free.pop()
+            data.reset(name_id, send_time, lifetime, size)
+            self.reused += 1
         else:
-            self.expire_time = self.send_time + MI_EXPIRE_TIME
+            data = Data(name_id, send_time, lifetime, size)
+            self.created += 1
+
+        data.refs = refs
+        return data
+
+    def copy(self, data: Data) -> Data:
+        """Creates a copy of travelling data, for sending it on another path.
+
+        Arguments:
+        data -- Data object being copied
+
+        Returns: Data"""
+
+        new = self.new(data.name_id, data.send_time, 0, data.size)
+        new.hops = data.hops
+        new.path_length = data.path_length
+        new.expire_time = data.expire_time
+        return new
+
+    def hold(self, data: Data):
+        """Counts a new holder of data, such as a CS caching it."""
+
+        data.refs += 1
+
+    def release(self, data: Data):
+        """Counts a holder letting go of data, and takes the data back once 
+        nothing holds it.
+
+        Arguments:
+        data -- Data object released"""
+
+        data.refs -= 1
+        if data.refs == 0 and self.enabled:
+            self.free.append(data)
 
 
 class ContentStore(object):
     """Represents the Content Store (CS) of a node and its functions.
 
+    Cached data is indexed by name so lookups are O(1), and expired data is 
+    dropped lazily from a heap ordered by expire time. Which data is cached 
+    and which is removed when the CS is full is left to its policy.
+
     Arguments:
-    env -- Simpy env in which the simulation takes place
+    sim -- Simulation object the CS belongs to
     max -- int representing the max amount of data the CS can hold
-    content -- list of data packages the CS holds
-    node_id -- int, id of the node the CS belongs to"""
-
-    def __init__(self, env: simpy.Environment, max: int, content: list[Data], 
-                 node_id: int):
-        self.env = env
-        # max_size is currently is defined by CACHE_SIZE.
+    content -- list of data packages the CS starts with
+    node_id -- int, id of the node the CS belongs to
+    popularity -- dictionary with name ids as keys and the times each was 
+                  requested at the node as values, names never requested 
+                  being left out
+    policy -- CachePolicy object, the CS management policy"""
+
+    def __init__(self, sim: "Simulation", max: int, content: list[Data], 
+                 node_id: int, popularity: dict[int, int], 
+                 policy: policies.CachePolicy):
+        self.sim = sim
+        self.env = sim.env
+        # max_size is currently is defined by the cache size of the sim.
         self.max_size = max
-        self.content = content
         self.node_id = node_id
+        self.popularity = popularity
+        self.policy = policy
+        self.policy.bind(self)
+
+        # Dictionary with name ids as keys and (Data, order) as values.
+        # A lower order means the data has been in the CS for longer.
+        self.entries = {}
+        # Heap of (expire_time, order, name id) for every cached data.
+        self.expiry = []
+        self.order = 0
+
+        self.reset(content)
+
+    def reset(self, content: list[Data]):
+        """Replaces everything in the CS with the given data.
+
+        Arguments:
+        content -- list of data packages, the first being the most recent"""
+
+        self.entries = {}
+        self.expiry = []
+        self.policy.clear()
+        # The last data in the list is treated as the oldest.
+        for d in reversed(content):
+            if d.name_id in self.entries:
+                self.remove(d.name_id)
+            self.insert(d)
+
+    def insert(self, data: Data):
+        """Adds data to the CS; any older copy must be removed first.
+
+        Arguments:
+        data -- Data object being cached"""
+
+        self.order += 1
+        self.entries[data.name_id] = (data, self.order)
+        self.sim.data_pool.hold(data)
+        heapq.heappush(self.expiry, (data.expire_time, self.order, data.name_id))
+        self.policy.on_insert(data.name_id)
+
+        # Rebuild the heap once stale items outnumber live ones.
+        if len(self.expiry) > 2*len(self.entries) + 64:
+            self.compact()
+
+    def compact(self):
+        """Rebuilds the expiry heap from the cached data, dropping items for 
+        data that was already replaced or removed."""
+
+        self.expiry = [(data.expire_time, order, name) 
+                       for name, (data, order) in self.entries.items()]
+        heapq.heapify(self.expiry)
+
+    def remove(self, name: int):
+        """Removes data from the CS.
+
+        Arguments:
+        name -- int, name id of the data being removed"""
+
+        data, order = self.entries.pop(name)
+        self.policy.on_remove(name)
+        self.sim.data_pool.release(data)
+
+    def expire(self):
+        """Removes data which has expired, oldest expire time first. 
+        Items for data that was already replaced or removed are skipped."""
+
+        while self.expiry and self.expiry[0][0] < self.env.now:
+            expire_time, order, name = heapq.heappop(self.expiry)
+            entry = self.entries.get(name)
+            if entry is not None and entry[1] == order:
+                self.remove(name)
+                logging.debug("%s has expired and has been removed", name)
+
+    def update_popularity(self, name: int):
+        """Tells the policy that the popularity of a name has changed; 
+        called by the node for every interest it receives.
+
+        Arguments:
+        name -- int, name id of the data requested"""
+
+        if name in self.entries:
+            self.policy.on_popularity(name)
 
     def search(self, interest: Interest) -> bool:
         """Checks if the CS already contains the requested data. 
@@ -103,16 +351,17 @@ class ContentStore(object):
         
         Returns: boolean"""
 
-        # CS searches for data name, which also must not be expired.
-        for d in self.content:
-            if interest.data_name == d.name and d.expire_time > self.env.now:
-                logging.debug("Data: %s found in Content Store", 
-                              interest.data_name)
-                # If found, return True.
-                return True
+        # CS looks up the name id, which also must not be expired.
+        entry = self.entries.get(interest.name_id)
+        if entry is not None and entry[0].expire_time > self.env.now:
+            logging.debug("Data: %s found in Content Store", 
+                          interest.name_id)
+            self.policy.on_hit(interest.name_id)
+            # If found, return True.
+            return True
             
         logging.debug("Data: %s not found in Content Store", 
-                      interest.data_name)
+                      interest.name_id)
         # If not found, return False.
         return False
     
@@ -123,54 +372,31 @@ class ContentStore(object):
         data -- Data object that is travelling through the node"""
 
         # First remove all the expired data.
-        for d in self.content:
-
-            if d.expire_time < self.env.now:
-                self.content.remove(d)
-                logging.debug("%s has expired and has been removed", d.name)
-
-        numb = random.random()
-
-        # CS will cache new data with pre-defined probability PROB.
-        if numb < PROB:
-            cache_status[data.name] += 1
-            self.content.insert(0, data)
+        self.expire()
+
+        # The policy decides whether the new data is cached.
+        if self.policy.admit(data):
+            cache_status = self.sim.cache_status
+            cache_status[data.name_id] += 1
+            # An older copy of the same data is replaced.
+            if data.name_id in self.entries:
+                cache_status[data.name_id] -= 1
+                self.remove(data.name_id)
+            self.insert(data)
             
-            # If size is too large, data will chosen to be removed.
-            if len(self.content) > self.max_size:
-                # The least desirable data will be set to the first entry.
-                # The data's popularity will be used in its "score"
-                if self.content[0].name in nodes[self.node_id].data_popularity:
+            # If size is too large, the policy chooses data to remove.
+            if len(self.entries) > self.max_size:
+                name = self.policy.victim()
+                cache_status[name] -= 1
+                self.remove(name)
 
-                    min_score = nodes[self.node_id].data_popularity[
-                        self.content[0].name]*(self.content[0].expire_time
-                                               -self.env.now)
-                # If popularity is not tracked by node, the score is 0.
-                else:
-                    min_score = 0
-
-                min_score_index = 0
-                for d in self.content:
-                    if d.name in nodes[self.node_id].data_popularity:
-                        score = nodes[self.node_id].data_popularity[
-                            d.name]*(d.expire_time-self.env.now)
-
-                    else:
-                        score = 0
-
-                    if score <= min_score:
-                        min_score = score
-                        min_score_index = self.content.index(d)
-
-                cache_status[self.content[min_score_index].name] -= 1
-                self.content.pop(min_score_index)
-
-            logging.debug("Cached %s in Content Store", data.name)
+            logging.debug("Cached %s in Content Store", data.name_id)
 
         else:
-            logging.debug("Did not cache %s in Content Store", data.name)
+            logging.debug("Did not cache %s in Content Store", data.name_id)
 
-        logging.debug("Current state of Content Store: %s", self.content)
+        logging.debug("Current state of Content Store: %s", 
+                      self.entries.keys())
 
     def send_data(self, channel_id: int, interest: Interest):
         """Creates Data object and sends it to the specified channel.
@@ -180,25 +406,81 @@ class ContentStore(object):
         interest -- Interest object representing the request"""
 
         # Create new data object when responding with data.
-        data = Data(self.env, interest.data_name)
+        data = self.sim.data_pool.new(
+            interest.name_id, self.env.now, 
+            self.sim.registry.lifetimes[interest.name_id], self.sim.data_size())
+        data.path_length = interest.hops
         logging.debug("Responding with data: %s to channel %s", 
-                     interest.data_name, channel_id)
-        yield self.env.process(channels[channel_id].forward_data(
-            data, interest, self.node_id))
+                     interest.name_id, channel_id)
+        self.sim.channels[channel_id].forward_data(data, interest, self.node_id)
 
 
 class PendingInterest(object):
     """Represents the Pending Interest Table (PIT) of a node 
     and its functions.
 
+    Every entry expires once the lifetimes of its interests have passed. 
+    Expiry is driven by a timing wheel: entries are put in a bucket for the 
+    tick they expire in, and the buckets of passed ticks are emptied 
+    whenever the PIT is used, so no SimPy event is needed for each entry.
+
     Arguments:
-    env -- Simpy env in which the simulation takes place"""
+    env -- Simpy env in which the simulation takes place
+    max_size -- int, max number of entries; None has no limit
+    tick -- float, length of a tick of the timing wheel in seconds"""
 
-    def __init__(self, env: simpy.Environment):
+    def __init__(self, env: simpy.Environment, max_size: int = None, 
+                 tick: float = 1):
         self.env = env
-        # Dictionary with data names as keys and dictionaries as values.
+        self.max_size = max_size
+        self.tick = tick
+        # Dictionary with name ids as keys and dictionaries as values.
         # The values are interest objects corresponding with channel ids.
         self.content = {}
+        # Dictionary with name ids as keys and expire times as values.
+        self.expire_times = {}
+        # Dictionary with tick numbers as keys and lists of name ids as 
+        # values; items are stale if the entry expires at a later time.
+        self.wheel = {}
+        # Next tick whose bucket has not been emptied.
+        self.next_tick = 0
+
+        # Interests added to an existing entry, entries which expired and 
+        # interests dropped because the PIT was full.
+        self.aggregations = 0
+        self.expired = 0
+        self.dropped = 0
+
+    def schedule(self, name_id: int, expire_time: float):
+        """Sets the expire time of an entry and puts it in its bucket."""
+
+        self.expire_times[name_id] = expire_time
+        tick = math.ceil(expire_time/self.tick)
+        self.wheel.setdefault(tick, []).append(name_id)
+
+    def advance(self):
+        """Removes the entries of every tick that has passed."""
+
+        now = self.env.now
+        now_tick = math.floor(now/self.tick)
+        if not self.wheel:
+            self.next_tick = now_tick + 1
+            return
+
+        while self.next_tick <= now_tick:
+            bucket = self.wheel.pop(self.next_tick, None)
+            self.next_tick += 1
+            if bucket is None:
+                continue
+
+            for name_id in bucket:
+                expire_time = self.expire_times.get(name_id)
+                if expire_time is not None and expire_time <= now:
+                    del self.content[name_id]
+                    del self.expire_times[name_id]
+                    self.expired += 1
+                    logging.debug("Data: %s expired in Pending Interest Table", 
+                                  name_id)
 
     def search(self, interest: Interest) -> bool:
         """Checks if the data name requested by the interest is already 
@@ -209,28 +491,40 @@ class PendingInterest(object):
         
         Returns: boolean"""
 
+        self.advance()
+
         # Check if the node has already forwarded a request for the data.
-        if interest.data_name in self.content:
+        if interest.name_id in self.content:
             logging.debug("Data: %s found in Pending Interest Table", 
-                          interest.data_name)
+                          interest.name_id)
             # Return True if found.
             return True
         
         logging.debug("Data: %s not found in Pending Interest Table", 
-                      interest.data_name)
+                      interest.name_id)
         # Otherwise, return False.
         return False
     
-    def add_name(self, interest: Interest, fromId: int):
-        """Adds new request to the content of the PIT.
+    def add_name(self, interest: Interest, fromId: int) -> bool:
+        """Adds new request to the content of the PIT, unless it is full.
         
         Arguments:
         interest -- Interest object representing the request
-        fromId -- int, id for the channel the interest came through"""
+        fromId -- int, id for the channel the interest came through
 
-        self.content[interest.data_name] = {interest: fromId}
+        Returns: boolean, False if the interest was dropped"""
+
+        if self.max_size is not None and len(self.content) >= self.max_size:
+            logging.debug("Pending Interest Table full, dropping request for %s", 
+                          interest.name_id)
+            self.dropped += 1
+            return False
+
+        self.content[interest.name_id] = {interest: fromId}
+        self.schedule(interest.name_id, self.env.now + interest.lifetime)
         logging.debug("Data: %s added to Pending Interest Table", 
-                      interest.data_name)
+                      interest.name_id)
+        return True
 
     def add_interface(self, interest: Interest, fromId: int):
         """Adds Interest object and channel id to an already-existing 
@@ -240,18 +534,34 @@ class PendingInterest(object):
         interest -- Interest object representing the request
         fromId -- int, the channel id the interest came from"""
 
-        self.content[interest.data_name][interest] = fromId
+        self.content[interest.name_id][interest] = fromId
+        self.aggregations += 1
+
+        # The entry lasts until the latest of its interests expires.
+        expire_time = self.env.now + interest.lifetime
+        if expire_time > self.expire_times[interest.name_id]:
+            self.schedule(interest.name_id, expire_time)
+
         logging.debug("Interface: %s added to %s in Pending Interest Table", 
-                     fromId, interest.data_name)
+                     fromId, interest.name_id)
         
-    def remove(self, data_name: str):
+    def remove(self, name_id: int) -> dict[Interest, int]:
         """Removes entry in PIT; called when the node receives the data.
         
         Arguments:
-        data_name -- String which corresponds to the name of the data"""
+        name_id -- int, id of the name of the data
 
-        self.content.pop(data_name)
-        logging.debug("Data: %s removed from Pending Interest Table", data_name)
+        Returns: dictionary of the entry's interests and channel ids, or 
+                 None if there is no entry for the name"""
+
+        self.advance()
+        entry = self.content.pop(name_id, None)
+        if entry is not None:
+            del self.expire_times[name_id]
+            logging.debug("Data: %s removed from Pending Interest Table", 
+                          name_id)
+
+        return entry
 
 
 class ForwardingBase(object):
@@ -259,16 +569,38 @@ class ForwardingBase(object):
     its functions.
     
     Arguments:
-    env -- Simpy env in which the simulation takes place
-    interfaces -- dictionary matching data names to channel ids
+    sim -- Simulation object the FIB belongs to
+    interfaces -- NameTrie matching name prefixes to channel ids
     node_id -- int, id of the node the FIB belongs to"""
 
-    def __init__(self, env: simpy.Environment, interfaces: dict[str, int], 
+    def __init__(self, sim: "Simulation", interfaces: forwarding.NameTrie, 
                  node_id: int):
-        self.env = env
-        # Dictionary with data names corresponding to channel ids.
+        self.sim = sim
+        self.env = sim.env
+        # Trie with name prefixes corresponding to channel ids.
         self.content = interfaces
         self.node_id = node_id
+        # Dictionary with name ids as keys and the channel ids found by 
+        # longest prefix match as values, so each name is matched once.
+        self.routes = {}
+        # Number of interests dropped because no prefix matched their name.
+        self.unrouted = 0
+
+    def lookup(self, name_id: int) -> int:
+        """Finds the channel to forward requests for a name id to.
+
+        Arguments:
+        name_id -- int, id of the name of the data requested
+
+        Returns: int, id of the channel"""
+
+        channel_id = self.routes.get(name_id)
+        if channel_id is None:
+            channel_id = self.content.longest_match(
+                self.sim.registry.components[name_id])
+            self.routes[name_id] = channel_id
+
+        return channel_id
 
     def send_request(self, interest: Interest):
         """Sends Interest object to a channel based on the FIB's content.
@@ -276,113 +608,347 @@ class ForwardingBase(object):
         Arguments:
         interest -- Interest object representing the request"""
 
-        logging.debug("Sending request for %s to Channel: %s", interest.data_name, 
-                     self.content[interest.data_name])
+        channel_id = self.lookup(interest.name_id)
+        if channel_id is None:
+            logging.debug("Node %s dropping request for %s, no route", 
+                          self.node_id, interest.name_id)
+            self.unrouted += 1
+            return
+
+        logging.debug("Sending request for %s to Channel: %s", interest.name_id, 
+                     channel_id)
         # FIB uses content to find the channel to forward the request to.
-        yield self.env.process(
-            channels[self.content[interest.data_name]].forward_interest(
-                interest, self.node_id))
+        self.sim.channels[channel_id].forward_interest(interest, self.node_id)
+        
+
+class Link(object):
+    """One direction of a channel. A single process runs for the whole 
+    sample, taking packets from a queue, transmitting them one at a time at 
+    the bandwidth of the simulation and scheduling their delivery, so no 
+    process is created for each packet.
+    
+    Arguments:
+    channel -- Channel object the link belongs to
+    to_node_id -- int, id of the node receiving the packets, -1 for users"""
+
+    def __init__(self, channel: "Channel", to_node_id: int):
+        self.channel = channel
+        self.env = channel.env
+        self.to_node_id = to_node_id
+        # Packets waiting to be sent, as (packet, interest).
+        self.queue = collections.deque()
+        # Event the process waits on while the queue is empty.
+        self.wake = None
+
+        # Totals for the link metrics, see stats.LinkMetrics.
+        self.sent = 0
+        self.dropped = 0
+        self.busy_time = 0.0
+        self.queue_area = 0.0
+        self.max_queue = 0
+        # Time the length of the queue last changed.
+        self.changed = self.env.now
+        # Time the packet being transmitted is fully sent.
+        self.busy_until = self.env.now
+
+        self.start()
+
+    def start(self):
+        """Starts the process sending the packets of the link."""
+
+        self.env.process(self.run())
+
+    def queue_changed(self):
+        """Adds the time since the last change to the queue area; called 
+        before the length of the queue changes."""
+
+        now = self.env.now
+        self.queue_area += len(self.queue)*(now - self.changed)
+        self.changed = now
+
+    def send(self, packet, interest: Interest = None):
+        """Adds a packet to the queue of the link, or drops it if the queue 
+        is full.
+        
+        Arguments:
+        packet -- Interest or Data object to send
+        interest -- Interest object associated with data, None for interests"""
+
+        buffer = self.channel.sim.link_buffer
+        if buffer is not None and len(self.queue) >= buffer:
+            logging.debug("Channel %s dropping %s, queue is full", 
+                          self.channel.id, packet.name_id)
+            self.dropped += 1
+            # A dropped data ends its trip.
+            if interest is not None:
+                self.channel.sim.data_pool.release(packet)
+            return
+
+        self.queue_changed()
+        self.queue.append((packet, interest))
+        if len(self.queue) > self.max_queue:
+            self.max_queue = len(self.queue)
+
+        if self.wake is not None:
+            wake = self.wake
+            self.wake = None
+            wake.succeed()
+
+    def run(self):
+        """Transmits packets from the queue and schedules their delivery."""
+
+        env = self.env
+        while True:
+            if not self.queue:
+                self.wake = env.event()
+                yield self.wake
+
+            self.queue_changed()
+            packet, interest = self.queue.popleft()
+
+            # The link is busy until the whole packet has been sent.
+            transmission = packet.size/self.channel.sim.bandwidth
+            self.busy_time += transmission
+            self.busy_until = env.now + transmission
+            self.sent += 1
+            yield env.timeout(transmission)
+
+            # The packet arrives once it has crossed the channel.
+            timeout = env.timeout(self.channel.delay())
+            timeout.callbacks.append(
+                lambda event, p = packet, i = interest: self.deliver(p, i))
+
+    def reset(self):
+        """Drops the totals so far, keeping the part of the transmission in 
+        progress which is still to come."""
+
+        self.queue_changed()
+        self.sent = 0
+        self.dropped = 0
+        self.busy_time = max(0, self.busy_until - self.env.now)
+        self.queue_area = 0.0
+        self.max_queue = len(self.queue)
+
+    def record(self, metrics: stats.LinkMetrics, index: int):
+        """Copies the totals of the link into the link metrics, leaving out 
+        transmission time after the current time.
+
+        Arguments:
+        metrics -- LinkMetrics object of the sample
+        index -- int, index of the link in metrics"""
+
+        self.queue_changed()
+        metrics.sent[index] = self.sent
+        metrics.dropped[index] = self.dropped
+        metrics.busy_time[index] = (self.busy_time 
+                                    - max(0, self.busy_until - self.env.now))
+        metrics.queue_area[index] = self.queue_area
+        metrics.max_queue[index] = self.max_queue
+
+    def deliver(self, packet, interest: Interest):
+        """Puts a packet that has crossed the link in the store of the 
+        receiving node.
+        
+        Arguments:
+        packet -- Interest or Data object that was sent
+        interest -- Interest object associated with data, None for interests"""
+
+        channel_id = self.channel.id
+        rnode_id = self.to_node_id
+
+        if interest is None:
+            logging.debug("Channel %s forwarding request for %s to %s", 
+                          channel_id, packet.name_id, rnode_id)
+            # Put the interest in the channel's store in the node.
+            self.channel.sim.nodes[rnode_id].stores[channel_id].put(packet)
+
+        # Nodes with ids of -1 represent requesting users.
+        # If the receiving node id = -1, the request is being satisfied.
+        elif rnode_id == -1:
+            logging.debug("Returning data: %s to user", packet.name_id)
+            # Calculate and log how long it took to satisfy the interest.
+            return_time = self.env.now - interest.creation_time
+            self.channel.sim.metrics.add_return_time(return_time)
+            self.channel.sim.data_pool.release(packet)
+
+        else:
+            logging.debug("Channel %s forwarding %s to %s", channel_id, 
+                          packet.name_id, rnode_id)
+            # Put the data in the channel's data store in the node.
+            self.channel.sim.nodes[rnode_id].data_stores[channel_id].put(packet)
+
+
+class HeapLink(Link):
+    """Link of the heap engine, see kernel.py. Transmissions and deliveries 
+    are callbacks of the event queue, and packets are handed straight to 
+    the receiving node instead of going through its stores. Packets are 
+    sent, delayed and received in the same order as with a Link, so the 
+    results are the same.
+    
+    Arguments:
+    channel -- Channel object the link belongs to
+    to_node_id -- int, id of the node receiving the packets, -1 for users"""
+
+    def start(self):
+        # Whether a packet is being transmitted.
+        self.sending = False
+
+    def send(self, packet, interest: Interest = None):
+        """Adds a packet to the queue of the link, and starts sending it if 
+        the link is idle.
+        
+        Arguments:
+        packet -- Interest or Data object to send
+        interest -- Interest object associated with data, None for interests"""
+
+        buffer = self.channel.sim.link_buffer
+        if buffer is not None and len(self.queue) >= buffer:
+            logging.debug("Channel %s dropping %s, queue is full", 
+                          self.channel.id, packet.name_id)
+            self.dropped += 1
+            # A dropped data ends its trip.
+            if interest is not None:
+                self.channel.sim.data_pool.release(packet)
+            return
+
+        self.queue_changed()
+        self.queue.append((packet, interest))
+        if len(self.queue) > self.max_queue:
+            self.max_queue = len(self.queue)
+
+        # As with a Link, sending starts once the events already due now 
+        # have run, so packets sent at the same time queue up together.
+        if not self.sending:
+            self.sending = True
+            self.env.schedule(0, self.transmit)
+
+    def transmit(self):
+        """Starts sending the first packet of the queue."""
+
+        self.queue_changed()
+        packet, interest = self.queue.popleft()
+
+        # The link is busy until the whole packet has been sent.
+        transmission = packet.size/self.channel.sim.bandwidth
+        self.busy_time += transmission
+        self.busy_until = self.env.now + transmission
+        self.sent += 1
+        self.env.schedule(transmission, self.transmitted, packet, interest)
+
+    def transmitted(self, packet, interest: Interest):
+        """Schedules the delivery of a packet which has been sent, and 
+        starts sending the next one."""
+
+        # The packet arrives once it has crossed the channel.
+        self.env.schedule(self.channel.delay(), self.deliver, packet, interest)
+
+        if self.queue:
+            self.transmit()
+        else:
+            self.sending = False
+
+    def deliver(self, packet, interest: Interest):
+        """Hands a packet that has crossed the link to the receiving node.
         
+        Arguments:
+        packet -- Interest or Data object that was sent
+        interest -- Interest object associated with data, None for interests"""
+
+        channel_id = self.channel.id
+        rnode_id = self.to_node_id
+
+        if interest is None:
+            logging.debug("Channel %s forwarding request for %s to %s", 
+                          channel_id, packet.name_id, rnode_id)
+            self.channel.sim.nodes[rnode_id].receive_request(packet, channel_id)
+
+        # Nodes with ids of -1 represent requesting users.
+        elif rnode_id == -1:
+            logging.debug("Returning data: %s to user", packet.name_id)
+            return_time = self.env.now - interest.creation_time
+            self.channel.sim.metrics.add_return_time(return_time)
+            self.channel.sim.data_pool.release(packet)
+
+        else:
+            logging.debug("Channel %s forwarding %s to %s", channel_id, 
+                          packet.name_id, rnode_id)
+            self.channel.sim.nodes[rnode_id].receive_data(packet)
+
 
 class Channel(object):
     """Connecting object between nodes which forwards interests and data.
     
     Arguments:
-    env -- Simpy env in which the simulation takes place
+    sim -- Simulation object the channel belongs to
     id -- int, the id a channel is assigned to
     nodes -- list containing the ids of the nodes the channel connects
     length -- int representing the length of the channel in meters"""
 
-    def __init__(self, env: simpy.Environment, id: int, nodes: list[int], length: int):
-        self.env = env
+    def __init__(self, sim: "Simulation", id: int, nodes: list[int], length: int):
+        self.sim = sim
+        self.env = sim.env
         self.id = id
         self.nodes = nodes
         self.length = length
-    
-    def forward_interest(self, interest: Interest, node_id: int):
-        """Puts the interest object in the store of the receiving node.
-        
-        Arguments:
-        interest -- Interest object representing the request
-        node_id -- int, id of the node the interest is coming from"""
+        # One link for each direction, with the sending node id as key.
+        link = HeapLink if sim.engine == "heap" else Link
+        self.links = {nodes[0]: link(self, nodes[1]), 
+                      nodes[1]: link(self, nodes[0])}
+
+    def delay(self) -> float:
+        """Calculates the time a packet takes to cross the channel after it 
+        has been transmitted.
+
+        Returns: float, delay in seconds"""
 
-        # delay = propagation delay + transmission delay +/- variance
-        delay = self.length/SIGNAL_SPEED + interest.size/BANDWIDTH 
-        + random.uniform(-DELAY_VARIANCE, DELAY_VARIANCE)
+        # delay = propagation delay +/- variance
+        delay = self.length/SIGNAL_SPEED + self.sim.delay_variance.draw()
 
         # delay must not be less than a minimum value, here 0.01.
         if delay < 0.01:
             delay = 0.01
 
-        yield self.env.timeout(delay)
-
-        # The channel determines which node to forward the interest to.
-        if self.nodes[0] == node_id:
-            rnode_id = self.nodes[1]
-
-        else:
-            rnode_id = self.nodes[0]
+        return delay
+    
+    def forward_interest(self, interest: Interest, node_id: int):
+        """Sends the interest to the store of the receiving node.
+        
+        Arguments:
+        interest -- Interest object representing the request
+        node_id -- int, id of the node the interest is coming from"""
 
-        logging.debug("Channel %s forwarding request for %s to %s", self.id, 
-                        interest.data_name, rnode_id)
-        # Put the interest in the channel's store in the node.
-        nodes[rnode_id].stores[self.id].put(interest)
+        self.links[node_id].send(interest)
 
     def forward_data(self, data: Data, interest: Interest, node_id: int):
-        """Puts data object in the store of receiving node.
+        """Sends the data to the store of the receiving node.
         
         Arguments:
         data -- Data object representing data package
         interest -- Interest object associated with the data name
-        node_id -- int, id of the node the interest is coming from"""
-
-        # delay = propagation delay + transmission delay +/- variance
-        delay = self.length/SIGNAL_SPEED + data.size/BANDWIDTH 
-        + random.uniform(-DELAY_VARIANCE, DELAY_VARIANCE)
-
-        # delay must not be less than a minimum value, here 0.01.
-        if delay < 0.01:
-            delay = 0.01
-
-        yield self.env.timeout(delay)
-
-        # The channel determines which node to forward the data to.
-        if self.nodes[0] == node_id:
-            rnode_id = self.nodes[1]
-
-        else:
-            rnode_id = self.nodes[0]
-
-        # Nodes with ids of -1 represent requesting users.
-        # If the receiving node id = 1, the request is being satisfied.
-        if rnode_id == -1:
-            logging.debug("Returning data: %s to user", data.name)
-            # Calculate and log how long it took to satisfy the interest.
-            return_time = self.env.now - interest.creation_time
-            return_times.append(return_time)
+        node_id -- int, id of the node the data is coming from"""
 
-        else:
-            logging.debug("Channel %s forwarding %s to %s", self.id, data.name, rnode_id)
-            # Put the data in the channel's data store in the node.
-            nodes[rnode_id].data_stores[self.id].put(data)
+        self.links[node_id].send(data, interest)
 
 
 class Node(object):
     """Represents a node in a network and its processes.
     
     Arguments:
-    env -- Simpy env in which the simulation takes place
+    sim -- Simulation object the node belongs to
     id -- int, the id the node is assigned to
     name -- String, the category of data the node produces
     channel_ids -- list containing the ids of the connected channels
     cssize -- int, the max size of the CS
     pisize -- int, the max size of the PIT
-    fbdata -- list, the content of the FIB
-    cscontent -- list, the starting content of the CS"""
-
-    def __init__(self, env: simpy.Environment, id: int, name: str, channel_ids: list[int], cssize: int, 
-                 fbdata: dict[str, int], cscontent: list[Data]):
-        self.env = env
+    fbdata -- NameTrie, the content of the FIB
+    cscontent -- list, the starting content of the CS
+    policy -- CachePolicy object, the CS management policy"""
+
+    def __init__(self, sim: "Simulation", id: int, name: str, channel_ids: list[int], cssize: int, 
+                 fbdata: forwarding.NameTrie, cscontent: list[Data], 
+                 policy: policies.CachePolicy):
+        self.sim = sim
+        self.env = sim.env
         self.id = id
         self.name = name
 
@@ -392,23 +958,33 @@ class Node(object):
         self.data_stores = {}
 
         self.channel_ids = channel_ids
-        # Each channel is a value which corresponds to its own store.
-        for x in channel_ids:
-            self.stores[x] = simpy.Store(env)
-            self.data_stores[x] = simpy.Store(env)
+        # Each channel is a value which corresponds to its own store. The 
+        # heap engine hands packets to the node directly, without stores.
+        if sim.engine == "simpy":
+            for x in channel_ids:
+                self.stores[x] = simpy.Store(self.env)
+                self.data_stores[x] = simpy.Store(self.env)
+
+        # Dictionary with the times each name id has been requested, only 
+        # holding the names requested at this node.
+        self.data_popularity = {}
 
         # Creating instances of the three main parts of each node.
-        self.content_store = ContentStore(self.env, cssize, cscontent, self.id)
-        self.pending_interest = PendingInterest(self.env)
-        self.forwarding_base = ForwardingBase(self.env, fbdata, self.id)
+        self.content_store = ContentStore(self.sim, cssize, cscontent, self.id, 
+                                          self.data_popularity, policy)
+        self.pending_interest = PendingInterest(self.env, sim.pit_size, 
+                                                sim.pit_tick)
+        self.forwarding_base = ForwardingBase(self.sim, fbdata, self.id)
 
-        # Dictionary which has data corresponding with times requested.
-        self.data_popularity = {}
+        # Stream used to shuffle the channels the node reads from.
+        self.rng = sim.streams.random("nodes")
 
         # Keeps track of how many times a node finds requested data in its CS.
         self.cache_hits = 0
         # Keeps track of how many total interests pass through the node.
         self.total_requests = 0
+        # Data received with no entry in the PIT.
+        self.unsolicited_data = 0
 
     def search_interests(self, storeNum: int):
         """Gets an interest from specified request store, will break if 
@@ -420,8 +996,10 @@ class Node(object):
         while True:
             # Function will stop if yield returns nothing.
             intrst = yield self.stores[storeNum].get()
-            # If the function continues, the node receives the request.
-            yield self.env.process(self.receive_request(intrst, storeNum))
+            # If the function continues, the node receives the request. 
+            # Packets are handed to the links without waiting for them to 
+            # arrive, so the next request can be taken straight away.
+            self.receive_request(intrst, storeNum)
 
     def search_data(self, storeNum: int):
         """Gets a data package from specified data store, will break if 
@@ -434,12 +1012,12 @@ class Node(object):
             # If checking the last channel, the list will be shuffled.
             # This ensures the node is not biased towards one channel.
             if storeNum == self.channel_ids[len(self.channel_ids) - 1]:
-                random.shuffle(self.channel_ids)
+                self.rng.shuffle(self.channel_ids)
 
             # Function will stop if yield returns nothing
             data = yield self.data_stores[storeNum].get()
             # If the function continues, the node receives the data.
-            yield self.env.process(self.receive_data(data))
+            self.receive_data(data)
 
     def receive_request(self, interest: Interest, from_channel_id: int):
         """Processes an interest found while searching stores.
@@ -448,27 +1026,33 @@ class Node(object):
         interest -- Interest object representing request
         from_channel_id -- id of channel interest came from"""
 
-        logging.debug("Node %s receiving request for %s", self.id, interest.data_name)
+        logging.debug("Node %s receiving request for %s", self.id, interest.name_id)
         # total_hits goes up by one when receiving an interest.
         self.total_requests += 1
         # The interest's hit distance also goes up by one.
-        hit_distances[interest.id] += 1
+        interest.hops += 1
 
-        if interest.data_name in self.data_popularity:
-            self.data_popularity[interest.data_name] += 1
+        name_id = interest.name_id
+        self.data_popularity[name_id] = self.data_popularity.get(name_id, 0) + 1
 
-        else:
-            self.data_popularity[interest.data_name] = 1
+        # The CS orders its data by popularity, so it must be told.
+        self.content_store.update_popularity(interest.name_id)
 
         # Check if the node is the producer for the data requested. 
-        if interest.data_name.startswith(self.name):
+        if self.sim.registry.producers[interest.name_id] == self.id:
             # If it is the producer, create data packet and send it back.
-            logging.debug("%s receiving request for %s", self.name, interest.data_name)
-            data = Data(self.env, interest.data_name)
+            logging.debug("%s receiving request for %s", self.name, interest.name_id)
+            data = self.sim.data_pool.new(
+                interest.name_id, self.env.now, 
+                self.sim.registry.lifetimes[interest.name_id], 
+                self.sim.data_size())
+            data.path_length = interest.hops
+            # The interest stops here, so its hit distance is final.
+            self.sim.metrics.add_hit_distance(interest.hops)
             logging.debug("Responding with data: %s to channel %s", 
-                         interest.data_name, from_channel_id)
-            yield self.env.process(channels[from_channel_id].forward_data(data, interest, 
-                                                                       self.id))
+                         interest.name_id, from_channel_id)
+            self.sim.channels[from_channel_id].forward_data(data, interest, 
+                                                            self.id)
             
         # below checks if the requested data is in the node's CS, if so, it 
         # creates a data packet and sends it back
@@ -476,20 +1060,21 @@ class Node(object):
             logging.debug("Going to respond with data...")
             # cache hits goes up by one
             self.cache_hits += 1
-            yield self.env.process(self.content_store.send_data(from_channel_id, 
-                                                                     interest))
+            self.sim.metrics.add_hit_distance(interest.hops)
+            self.content_store.send_data(from_channel_id, interest)
             
         # if the node has already sent a request for this data (meaning it is 
         # already in the PIT), it will add the interface the interest came from 
         # to the dictionary entry for the data
         elif self.pending_interest.search(interest):
             self.pending_interest.add_interface(interest, from_channel_id)
+            self.sim.metrics.add_hit_distance(interest.hops)
 
         # otherwise, a new entry will be created in the PIT and the FIB will 
         # forward the request
         else:
-            self.pending_interest.add_name(interest, from_channel_id)
-            yield self.env.process(self.forwarding_base.send_request(interest))
+            if self.pending_interest.add_name(interest, from_channel_id):
+                self.forwarding_base.send_request(interest)
 
     def receive_data(self, data: Data):
         """Processes data found while searching data stores.
@@ -497,7 +1082,7 @@ class Node(object):
         Arguments:
         data -- Data object representing data package"""
 
-        logging.debug("Node %s receiving data: %s", self.id, data.name)
+        logging.debug("Node %s receiving data: %s", self.id, data.name_id)
 
         # the intrsts and channel_ids lists hold the important information for 
         # forwarding the data
@@ -505,64 +1090,36 @@ class Node(object):
         intrsts = []
         channel_ids = []
         # find the interests and the interfaces associated with data being 
-        # forwarded in the PIT
-        for x in self.pending_interest.content[data.name]:
+        # forwarded in the PIT, and remove the entry from the PIT
+        entry = self.pending_interest.remove(data.name_id)
+
+        # Data nobody is waiting for (never requested, or its entry has 
+        # expired) is dropped.
+        if entry is None:
+            logging.debug("Node %s dropping unsolicited data: %s", self.id, 
+                          data.name_id)
+            self.unsolicited_data += 1
+            self.sim.data_pool.release(data)
+            return
+
+        for x in entry:
             intrsts.append(x)
-            channel_ids.append(self.pending_interest.content[data.name][x])
-
-        # remove the entry from the PIT
-        self.pending_interest.remove(data.name)
+            channel_ids.append(entry[x])
 
         # have the CS (potentially) cache the data
+        data.hops += 1
         self.content_store.cache_data(data)
 
-        # send the data through all the interfaces
+        # send the data through all the interfaces at once
         for x in range(0, len(intrsts)):
-            yield self.env.process(channels[channel_ids[x]].forward_data(data, 
-                                                                       intrsts[x], self.id))
+            # Each extra interface gets its own copy so hop counts stay 
+            # separate on each path.
+            if x > 0:
+                data = self.sim.data_pool.copy(data)
+            self.sim.channels[channel_ids[x]].forward_data(data, intrsts[x], 
+                                                           self.id)
             
 
-def interest_arrival():
-    """Creates interest objects and sends them through random 
-    edge channels."""
-
-    # Interest ids start at 0
-    interest_id = 0
-
-    # Create the list of edge channels to send interests through.
-    channel_ids = []
-    for e in edge_channels:
-        channel_ids.append(e["id"])
-    
-    while True:
-        yield env.timeout(random.uniform(0.5, 1.5))  
-
-        if random.random() < 0.3:
-            nodenum = 13
-
-        else:
-            # Generate a random data producer to request data from.
-            nodenum = random.randint(0, len(node_names)-1) 
-
-        # Below the data name is specified while creating the interest.
-        interest = Interest(env, interest_id, 
-                            node_names[nodenum][
-                                random.randint(0, len(node_names[nodenum])-1)])
-        
-        # Create a new entry in hit distances list.
-        hit_distances.append(0)
-
-        logging.debug("About to send request for %s", interest.data_name)
-        # New interests will be sent through random edge channel.
-        yield env.process(channels[random.choice(channel_ids)].forward_interest(interest, -1))
-        interest_id += 1
-
-env = simpy.Environment()
-
-# Lists for nodes and channels keep track of Node and Channel objects.
-nodes = []
-channels = []
-
 # Defining data names for each data-producing node.
 uuv_names = ["uuv", "uuv/health_info", "uuv/mission_info", "uuv/mission_info/mission_log", "uuv/mission_info/route", "uuv/mission_info/antennas", "uuv/mission_info/antennas/antenna1", "uuv/mission_info/antennas/antenna2", "uuv/mission_info/antennas/antenna3", "uuv/mission_info/sensors", "uuv/mission_info/sensors/sensor1", "uuv/mission_info/sensors/sensor2", "uuv/mission_info/sensors/sensor3", "uuv/mission_info/location", "uuv/mission_info/depth", "uuv/health_info/log", "uuv/health_info/antenna_conditions/antenna1", "uuv/health_info/antenna_conditions/antenna2", "uuv/health_info/antenna_conditions/antenna3", "uuv/health_info/sensor_conditions/sensor1", "uuv/health_info/sensor_conditions/sensor2", "uuv/health_info/sensor_conditions/sensor3", "uuv/health_info/battery_level"]
 uuv1 = ["uuv1", "uuv1/health_info", "uuv1/mission_info", "uuv1/mission_info/mission_log", "uuv1/mission_info/route", "uuv1/mission_info/antennas", "uuv1/mission_info/antennas/antenna1", "uuv1/mission_info/antennas/antenna2", "uuv1/mission_info/antennas/antenna3", "uuv1/mission_info/sensors", "uuv1/mission_info/sensors/sensor1", "uuv1/mission_info/sensors/sensor2", "uuv1/mission_info/sensors/sensor3", "uuv1/mission_info/location", "uuv1/mission_info/depth", "uuv1/health_info/log", "uuv1/health_info/antenna_conditions/antenna1", "uuv1/health_info/antenna_conditions/antenna2", "uuv1/health_info/antenna_conditions/antenna3", "uuv1/health_info/sensor_conditions/sensor1", "uuv1/health_info/sensor_conditions/sensor2", "uuv1/health_info/sensor_conditions/sensor3", "uuv1/health_info/battery_level"]
@@ -598,333 +1155,576 @@ node_names.append(uuv8)
 node_names.append(usv5)
 node_names.append(usv6)
 
-# hit_distances and return_times are ordered by corresponding interest id.
-hit_distances = []
-return_times = []
+# Name lists every USV and UUV name list is made from.
+name_templates = {"usv": usv_names, "uuv": uuv_names}
 
-# Keeps track of the number of current caches of each data name.
-cache_status = {}
-for r in range(0, len(node_names)):
-    for n in node_names[r]:
-        cache_status[n] = 0
 
-# Creating an list of content for the forwarding interest base of each node.
-# Content is a dictionary with data names as keys and channel ids as values.
-content = []
+def graph_names(graph: nx.Graph) -> list[list[str]]:
+    """Creates the data names of every node of a generated network from 
+    the "kind" of each node, numbering the USVs and UUVs from 1.
 
-content1 = {}
-for r in range(0, len(node_names)):
-    for n in node_names[r]:
-        content1[n] = 1
+    Arguments:
+    graph -- networkx graph with nodes numbered from 0
 
-content.append(content1)
+    Returns: 2D list with a list of data names for each node, by node id"""
 
-content2 = {}
-for r in range(0, len(node_names)):
-    if r == 0:
-        for n in node_names[r]:
-            content2[n] = 1
-    else:
-        for n in node_names[r]:
-            content2[n] = 1
-content.append(content2)
-
-content3 = {}
-for r in range(0, len(node_names)):
-    if r < 2:
-        for n in node_names[r]:
-            content3[n] = 2
-    else:
-        for n in node_names[r]:
-            content3[n] = 3
-content.append(content3)
-
-content4 = {}
-for r in range(0, len(node_names)):
-    for n in node_names[r]:
-        content4[n] = 5
-content.append(content4)
-
-content5 = {}
-for r in range(0, len(node_names)):
-    if r == 3:
-        for n in node_names[r]:
-            content5[n] = 5
-    else:
-        for n in node_names[r]:
-            content5[n] = 6
-content.append(content5)
-
-content6 = {}
-for r in range(0, len(node_names)):
-    if r < 5 and r > 2:
-        for n in node_names[r]:
-            content6[n] = 6
-    else:
-        for n in node_names[r]:
-            content6[n] = 7
-content.append(content6)
-
-content7 = {}
-for r in range(0, len(node_names)):
-    for n in node_names[r]:
-        content7[n] = 9
-content.append(content7)
-
-content8 = {}
-for r in range(0, len(node_names)):
-    if r == 6:
-        for n in node_names[r]:
-            content8[n] = 9
-    else:
-        for n in node_names[r]:
-            content8[n] = 10
-content.append(content8)
-
-content9 = {}
-for r in range(0, len(node_names)):
-    if r < 8 and r > 5:
-        for n in node_names[r]:
-            content9[n] = 10
-    else:
-        for n in node_names[r]:
-            content9[n] = 11
-content.append(content9)
-
-content10 = {}
-for r in range(0, len(node_names)):
-    for n in node_names[r]:
-        content10[n] = 13
-content.append(content10)
-
-content11 = {}
-for r in range(0, len(node_names)):
-    if r == 9:
-        for n in node_names[r]:
-            content11[n] = 13
-    else:
-        for n in node_names[r]:
-            content11[n] = 14
-content.append(content11)
-
-content12 = {}
-for r in range(0, len(node_names)):
-    if r < 11 and r > 8:
-        for n in node_names[r]:
-            content12[n] = 14
-    else:
-        for n in node_names[r]:
-            content12[n] = 15
-content.append(content12)
-
-content13 = {}
-for r in range(0, len(node_names)):
-    if r < 12 and r > 8:
-        for n in node_names[r]:
-            content13[n] = 15
-    elif r < 9 and r > 5:
-        for n in node_names[r]:
-            content13[n] = 11
-    else:
-        for n in node_names[r]:
-            content13[n] = 16
-content.append(content13)
-
-content14 = {}
-for r in range(0, len(node_names)):
-    if r < 6 and r > 2:
-        for n in node_names[r]:
-            content14[n] = 7
-    elif r < 3:
-        for n in node_names[r]:
-            content14[n] = 3
-    else:
-        for n in node_names[r]:
-            content14[n] = 16
-content.append(content14)
-
-# Getting results from network file, which are a dictionary.
-results = network.graph_configuration()
-H = results["graph"]
-# network sends a list of edge channels, which are not part of the graph.
-edge_channels = results["edge_channels"]
-
-# Keeps track of ids so edge channels can be added at the right index.
-past = -1
-
-for e in H.edges:
-    # Checking if any edge channels should be added to channels list.
-    for r in edge_channels:
-        # Add if edge channel id is between past and the current id.
-        if r["id"] > past and r["id"] < H.edges[e]["id"]:
-            # One of the ids for an edge channel's nodes is -1.
-            channels.append(Channel(env, r["id"], [-1, r["node"]], 
-                                    r["length"]))
-
-    # Channel objects are created using attributes of graph edges.
-    channels.append(Channel(env, H.edges[e]["id"], [e[0], e[1]], 
-                            H.edges[e]["length"]))
-
-    past = H.edges[e]["id"]
-
-for n in H.nodes:
-    # Keeps track of channel ids connected to the node, reset each time.
-    c_ids = []
-
-    # Check graph edges for connected channels.
-    for e in H.edges(n):
-        c_ids.append(H.edges[e]["id"])
-
-    # Check if node is connected to an edge channel.
-    for r in edge_channels:
-        if r["node"] == n:
-            c_ids.append(r["id"])
-            
-    # Pre-fill CS.
-    cscontent = []
-    for i in range(0, CACHE_SIZE):
-        rand = random.randint(0, len(node_names) - 1)
-        cscontent.append(Data(env, node_names[rand][
-            random.randint(0, len(node_names[rand]) - 1)]))
-
-    # Create the node object and add to nodes.
-    nodes.append(Node(env, n, node_names[n][0], c_ids, CACHE_SIZE, 
-                      content[n], cscontent))
-
-# Create the queue of environment processes.
-env.process(interest_arrival())
-
-# Search interest and data stores of each channel connected to a node.
-for n in nodes:
-    for i in range(0, len(n.channel_ids)):
-        env.process(n.search_interests(n.channel_ids[i]))
-        env.process(n.search_data(n.channel_ids[i]))
-
-# These lists keep track of where the data for each run/sample starts.
-hd_indexes = []
-rt_indexes = []
-
-for i in range(0, SAMPLES):
-    hd_indexes.append(len(hit_distances) - 1)
-    rt_indexes.append(len(rt_indexes) - 1)
-
-    env.run(until = env.now + RUN_TIME)
-    
-    # Reset CS.
-    for n in nodes:
+    counts = {}
+    names = []
+    for n in range(0, len(graph)):
+        kind = graph.nodes[n].get("kind", "uuv")
+        counts[kind] = counts.get(kind, 0) + 1
+        prefix = kind + str(counts[kind])
+        names.append([prefix + x[len(kind):] for x in name_templates[kind]])
+
+    return names
+
+
+class Simulation(object):
+    """Owns the network, nodes and results of one configuration, and runs 
+    independent samples of it.
+
+    Arguments:
+    prob -- float, probability that data will be cached when passing a CS
+    cache_size -- int, max size of a CS
+    policy -- String, CS management policy of every node
+    node_policies -- dictionary of node ids and policy names, for nodes 
+                     which use a different policy
+    hi_expire_time -- float, health information expire time in seconds
+    mi_expire_time -- float, mission information expire time in seconds
+    run_time -- float, simulated seconds in a sample, at most
+    reservoir_size -- int, number of raw hit distances and return times 
+                      kept as a random sample; 0 keeps none
+    keep_raw -- boolean, whether every hit distance and return time is kept
+    names -- 2D list with a list of data names for each node, by node id
+    fib -- list with the name prefixes and channel ids in the FIB of each 
+           node, by node id; None builds the FIBs from shortest paths
+    topology -- dictionary with the graph and edge channels of the network, 
+                e.g. from topology.py; None uses network.py for every 
+                sample
+    scenario -- String, path of a scenario file giving the topology, names 
+                and FIBs which are not given directly, see scenario.py
+    bandwidth -- float, rate at which each direction of a channel transmits
+    link_buffer -- int, max number of packets waiting in each direction of 
+                   a channel; None has no limit
+    workload -- Workload object drawing the interests, see workloads.py; 
+                None uses the original workload, which only favours 
+                HOT_NODE on the original network
+    interest_lifetime -- float, seconds an interest waits in a PIT
+    pit_size -- int, max number of entries in a PIT; None has no limit
+    pit_tick -- float, seconds between the ticks at which PIT entries 
+                expire
+    pool_packets -- boolean, whether data which is no longer used is reused
+    engine -- String, "simpy" or "heap", the engine running the events
+    warm_up -- float, seconds at the start of a sample left out of the 
+               results
+    precision -- float, largest half width of the confidence intervals of 
+                 a sample relative to the means; None runs to run_time
+    check_interval -- float, simulated seconds between checks of the 
+                      confidence intervals"""
+
+    def __init__(self, prob: float = PROB, cache_size: int = CACHE_SIZE, 
+                 policy: str = POLICY, node_policies: dict[int, str] = None, 
+                 hi_expire_time: float = HI_EXPIRE_TIME, 
+                 mi_expire_time: float = MI_EXPIRE_TIME, 
+                 run_time: float = RUN_TIME, reservoir_size: int = 0, 
+                 keep_raw: bool = False, names: list[list[str]] = None, 
+                 fib: list[dict[str, int]] = None, topology: dict = None, 
+                 scenario: str = None, bandwidth: float = BANDWIDTH, 
+                 link_buffer: int = LINK_BUFFER, 
+                 workload: workloads.Workload = None, 
+                 interest_lifetime: float = INTEREST_LIFETIME, 
+                 pit_size: int = PIT_SIZE, pit_tick: float = PIT_TICK, 
+                 pool_packets: bool = POOL_PACKETS, engine: str = ENGINE, 
+                 warm_up: float = WARM_UP, precision: float = PRECISION, 
+                 check_interval: float = CHECK_INTERVAL):
+        # Keeps the arguments so the same simulation can be built elsewhere.
+        self.config = {"prob": prob, "cache_size": cache_size, 
+                       "policy": policy, "node_policies": node_policies, 
+                       "hi_expire_time": hi_expire_time, 
+                       "mi_expire_time": mi_expire_time, 
+                       "run_time": run_time, "reservoir_size": reservoir_size, 
+                       "keep_raw": keep_raw, "names": names, "fib": fib, 
+                       "topology": topology, "scenario": scenario, 
+                       "bandwidth": bandwidth, "link_buffer": link_buffer, 
+                       "workload": workload, 
+                       "interest_lifetime": interest_lifetime, 
+                       "pit_size": pit_size, "pit_tick": pit_tick, 
+                       "pool_packets": pool_packets, "engine": engine, 
+                       "warm_up": warm_up, "precision": precision, 
+                       "check_interval": check_interval}
+
+        self.prob = prob
+        self.cache_size = cache_size
+        self.policy = policy
+        self.node_policies = node_policies or NODE_POLICIES
+        self.hi_expire_time = hi_expire_time
+        self.mi_expire_time = mi_expire_time
+        self.run_time = run_time
+        self.bandwidth = bandwidth
+        self.link_buffer = link_buffer
+        self.workload = workload or workloads.LegacyWorkload(
+            HOT_NODE if topology is None and scenario is None else None)
+        self.interest_lifetime = interest_lifetime
+        self.pit_size = pit_size
+        self.pit_tick = pit_tick
+        self.pool_packets = pool_packets
+        if engine not in ("simpy", "heap"):
+            raise ValueError("Unknown engine: %s" % engine)
+        self.engine = engine
+        if warm_up >= run_time:
+            raise ValueError("The warm-up must be shorter than the run time")
+        self.warm_up = warm_up
+        self.precision = precision
+        self.check_interval = check_interval
+        self.reservoir_size = reservoir_size
+        self.keep_raw = keep_raw
+        if scenario is not None:
+            # Imported here since the scenario module imports this one.
+            import scenario as scenario_loader
+
+            loaded = scenario_loader.load(scenario)
+            topology = topology or loaded["topology"]
+            names = names or loaded["names"]
+            fib = fib or loaded["fib"]
+
+        self.topology = topology
+        if names is None and topology is not None:
+            names = graph_names(topology["graph"])
+        self.node_names = names or node_names
+        self.fib = fib
+
+        # Every data name is given an int id, which is used everywhere else.
+        self.registry = registry.NameRegistry.from_node_names(
+            self.node_names, hi_expire_time, mi_expire_time)
+        self.fib_tables = None
+        if fib is not None:
+            self.fib_tables = [forwarding.NameTrie.from_prefixes(f) 
+                               for f in fib]
+
+        # The environment, network and results of the current sample.
+        # All of these are replaced by setup().
+        self.env = None
+        self.graph = None
+        self.edge_channels = []
+        # Lists for nodes and channels keep track of Node and Channel objects.
+        self.nodes = []
+        self.channels = []
+        # Both directions of every channel, in order of channel id.
+        self.links = []
+        # Hit distances and return times of the current sample.
+        self.metrics = stats.Metrics()
+        # Random streams of the current sample, see rng.py.
+        self.streams = rng.RngRegistry()
+        # Creates the data of the current sample.
+        self.data_pool = DataPool(pool_packets)
+        self.size_variance = None
+        self.delay_variance = None
+        # Keeps track of the number of current caches of each name id.
+        self.cache_status = []
+
+    def prefill_cs(self) -> list[Data]:
+        """Creates the starting content of a CS from random data names.
+        
+        Returns: list of Data objects"""
+
+        by_producer = self.registry.by_producer
+        prefill = self.streams.random("prefill")
         cscontent = []
-        for i in range(0, CACHE_SIZE):
-            rand = random.randint(0, len(node_names) - 1)
-            cscontent.append(Data(env, node_names[rand][random.randint(
-                0, len(node_names[rand]) - 1)]))
+        for i in range(0, self.cache_size):
+            rand = prefill.randint(0, len(self.node_names) - 1)
+            name_id = by_producer[rand][
+                prefill.randint(0, len(by_producer[rand]) - 1)]
+            # The data is not sent, so only the CS holds it.
+            cscontent.append(self.data_pool.new(
+                name_id, self.env.now, self.registry.lifetimes[name_id], 
+                self.data_size(), refs = 0))
 
-        n.content_store.content = cscontent
-    
-    # Reset cache_status.
-    for c in cache_status:
-        cache_status[c] = 0
-
-# Calculate the average cache-hit ratio (cache_hits/total_requests).
-total = 0
-length = 0
-for n in nodes:
-    if type(n) == Node and n.total_requests != 0:
-        total += n.cache_hits/n.total_requests
-        length += 1
-
-logging.info("Average cache hit ratio: %s", total/length)
-
-# Log the average hit distance and variance.
-logging.info("Average hit distance: %s", statistics.mean(hit_distances))
-logging.info("Hit distance variance across all interests: %s", 
-             statistics.variance(hit_distances))
-
-# Log the average return time and variance.
-logging.info("Average return time: %s", statistics.mean(return_times))
-logging.info("Return time variance across all interests: %s", 
-             statistics.variance(return_times))
-
-logging.info("Percent 1: %s", 100 * hit_distances.count(1)/len(hit_distances))
-logging.info("Percent 2: %s", 100 * hit_distances.count(2)/len(hit_distances))
-logging.info("Percent 3: %s", 100 * hit_distances.count(3)/len(hit_distances))
-logging.info("Percent 4: %s", 100 * hit_distances.count(4)/len(hit_distances))
-logging.info("Percent 5: %s", 100 * hit_distances.count(5)/len(hit_distances))
-
-
-# Find the average hit distance for each sample.
-hd_averages = []
-for i in range(0, len(hd_indexes) - 1):
-    hd_averages.append(statistics.mean(hit_distances[
-        hd_indexes[i] + 1:hd_indexes[i+1]+1]))
-
-# Add last sample.
-hd_averages.append(statistics.mean(hit_distances[
-    hd_indexes[len(hd_indexes)-1]+1:]))
-
-# Log variance.
-logging.info("Hit distance variance across average hit distance of samples: %s", 
-             statistics.variance(hd_averages))
-
-
-# Find the average return time for each sample.
-rt_averages = []
-for i in range(0, len(rt_indexes) - 1):
-    rt_averages.append(statistics.mean(return_times[
-        rt_indexes[i]+1:rt_indexes[i+1]+1]))
-
-# Add last sample.
-rt_averages.append(statistics.mean(return_times[rt_indexes[
-    len(rt_indexes)-1]+1:]))
-
-#Log variance.
-logging.info("Return time variance across average return time of samples: %s", 
-             statistics.variance(rt_averages))
-
-
-# Plot hit distance across samples.
-seaborn.histplot(hd_averages)
-plt.xlabel("Average Hit Distance in a Run")
-plt.ylabel("Frequency")
-mean = statistics.mean(hit_distances)
-plt.title("Hit Distances Histogram With " + str(PROB) 
-          + " Probability of Caching: Mean = " + str(round(mean, 4)))
-plt.show()
-
-
-# Plot return times across samples.
-seaborn.histplot(rt_averages)
-plt.xlabel("Average Return Time in a Run")
-plt.ylabel("Frequency")
-mean = statistics.mean(return_times)
-plt.title("Return Times Histogram With " + str(PROB) 
-          + " Probability of Caching: Mean = " + str(round(mean, 4)))
-plt.show()
-
-
-# Graph network.
-center_node = nodes[13]
-edge_nodes = set(H) - {center_node}
-pos = nx.circular_layout(H.subgraph(edge_nodes))
-pos[center_node] = numpy.array([0, 0])
-nx.draw(H)
-plt.draw()
-plt.show()
-
-with open("data.csv", "w", newline = '') as csvfile:
-    field_names = ["Date", "Probability", "Sample Size", "Run Time", 
-                   "Average Hit Distance", "HD Variance Across Interests", 
-                   "HD Variance Across Samples", "HD Sample Averages", 
-                   "Average Return Time", "RT Variance Across Interests",
-                   "RT Variance Across Samples", "RT Sample Averages"]
-    dwriter = csv.DictWriter(csvfile, fieldnames=field_names)
-    dwriter.writeheader()
-    dwriter.writerow({"Date": datetime.datetime.now, "Probability": PROB, 
-                     "Sample Size": SAMPLES, "Run Time": RUN_TIME, 
-                     "Average Hit Distance": statistics.mean(hit_distances), 
-                     "HD Variance Across Interests": statistics.variance(hit_distances), 
-                     "HD Variance Across Samples": statistics.variance(hd_averages), 
-                     "HD Sample Averages": hd_averages,
-                     "Average Return Time": statistics.mean(return_times),
-                     "RT Variance Across Interests": statistics.variance(return_times),
-                     "RT Variance Across Samples": statistics.variance(rt_averages),
-                     "RT Sample Averages": rt_averages})
\ No newline at end of file
+        return cscontent
+
+    def data_size(self) -> float:
+        """Draws the size of new data, which is variable.
+
+        Returns: float"""
+
+        return 2000 + self.size_variance.draw()
+
+    def setup(self, seed: int = None):
+        """Builds a new environment with its own network, nodes and 
+        processes. Everything left by an earlier sample is replaced.
+
+        Arguments:
+        seed -- int, seed of the random streams of the sample; None picks 
+                a random one"""
+
+        if self.engine == "heap":
+            self.env = kernel.EventQueue()
+        else:
+            self.env = simpy.Environment()
+        self.nodes = []
+        self.channels = []
+        self.data_pool = DataPool(self.pool_packets)
+        # Every part of the simulation draws from its own stream, so a 
+        # change in one part does not change the values drawn by the others.
+        self.streams = rng.RngRegistry(seed)
+        self.size_variance = self.streams.uniform("packets", -200, 200)
+        self.delay_variance = self.streams.uniform(
+            "links", -DELAY_VARIANCE, DELAY_VARIANCE)
+        # The random samples of raw values use their own stream so that 
+        # they do not change the course of the simulation.
+        self.metrics = stats.Metrics(self.reservoir_size, 
+                                     self.streams.random("metrics"), 
+                                     self.keep_raw)
+
+        self.cache_status = [0]*len(self.registry)
+
+        # Getting results from network file, which are a dictionary.
+        results = self.topology or network.graph_configuration(
+            self.streams.generator("topology"))
+        H = results["graph"]
+        self.graph = H
+        # network sends a list of edge channels, which are not in the graph.
+        self.edge_channels = results["edge_channels"]
+
+        # FIBs follow the shortest paths to the producers unless given.
+        fibs = self.fib_tables
+        if fibs is None:
+            producers = {n: forwarding.common_prefix(self.node_names[n]) 
+                         for n in H.nodes}
+            fibs = forwarding.build_fibs(H, producers)
+
+        # Channel objects are created using attributes of graph edges and 
+        # edge channels; one of the ids for an edge channel's nodes is -1.
+        specs = []
+        for e in H.edges:
+            specs.append((H.edges[e]["id"], [e[0], e[1]], H.edges[e]["length"]))
+        # Edge channels of each node.
+        node_edges = {}
+        for r in self.edge_channels:
+            specs.append((r["id"], [-1, r["node"]], r["length"]))
+            node_edges.setdefault(r["node"], []).append(r["id"])
+
+        # Channels are found by id, so they are added in order of id.
+        for channel_id, nodes, length in sorted(specs):
+            self.channels.append(Channel(self, channel_id, nodes, length))
+
+        self.links = []
+        for c in self.channels:
+            self.links.append(c.links[c.nodes[0]])
+            self.links.append(c.links[c.nodes[1]])
+
+        for n in H.nodes:
+            # Keeps track of channel ids connected to the node.
+            c_ids = []
+
+            # Check graph edges for connected channels.
+            for e in H.edges(n):
+                c_ids.append(H.edges[e]["id"])
+
+            # Check if node is connected to an edge channel.
+            c_ids.extend(node_edges.get(n, []))
+
+            # Create the node object with a pre-filled CS and add to nodes.
+            policy = policies.create_policy(
+                self.node_policies.get(n, self.policy), self.prob)
+            self.nodes.append(Node(self, n, self.node_names[n][0], c_ids, 
+                                   self.cache_size, fibs[n], 
+                                   self.prefill_cs(), policy))
+
+        # Create the queue of environment processes.
+        self.workload.start(self, self.streams.generator("workload"))
+        self.env.process(self.interest_arrival())
+
+        # Search interest and data stores of each channel connected to a node.
+        # The heap engine has no stores, its links call the nodes directly.
+        if self.engine == "simpy":
+            for n in self.nodes:
+                for i in range(0, len(n.channel_ids)):
+                    self.env.process(n.search_interests(n.channel_ids[i]))
+                    self.env.process(n.search_data(n.channel_ids[i]))
+
+    def interest_arrival(self):
+        """Creates interest objects at the times drawn by the workload and 
+        sends them through their edge channels."""
+
+        env = self.env
+
+        # Interest ids start at 0
+        interest_id = 0
+
+        while True:
+            times, channel_ids, name_ids = self.workload.next_batch()
+            if len(times) == 0:
+                return
+
+            for t, channel_id, name_id in zip(times.tolist(), 
+                                               channel_ids.tolist(), 
+                                               name_ids.tolist()):
+                if t > env.now:
+                    yield env.timeout(t - env.now)
+
+                interest = Interest(interest_id, name_id, env.now, 
+                                    self.interest_lifetime)
+                logging.debug("About to send request for %s", name_id)
+                # The next interest does not wait for this one to arrive.
+                self.channels[channel_id].forward_interest(interest, -1)
+                interest_id += 1
+
+    def run_sample(self, seed: int) -> dict:
+        """Runs one independent sample of the simulation in a new environment.
+
+        Arguments:
+        seed -- int, seed of the random streams of the sample, of any size
+
+        Returns: dictionary of the results of the sample"""
+
+        # Anything still using the global generators is seeded as well, 
+        # with the low 32 bits which numpy.random.seed accepts.
+        random.seed(seed % 2**32)
+        numpy.random.seed(seed % 2**32)
+        self.setup(seed)
+
+        if self.warm_up > 0:
+            self.env.run(until = self.warm_up)
+            self.end_warm_up()
+
+        if self.precision is None:
+            self.env.run(until = self.run_time)
+
+        else:
+            # Values are kept in order until the sample stops, and only 
+            # those after the transient are added to the metrics.
+            metrics = self.metrics
+            self.metrics = stats.SteadyState()
+            while self.env.now < self.run_time:
+                self.env.run(until = min(self.env.now + self.check_interval, 
+                                         self.run_time))
+                if self.metrics.converged(self.precision):
+                    logging.debug("Sample converged after %s seconds", 
+                                  self.env.now)
+                    break
+
+            self.metrics.replay(metrics)
+            self.metrics = metrics
+
+        self.metrics.end_sample()
+
+        links = stats.LinkMetrics(len(self.links))
+        links.time = self.env.now - self.warm_up
+        for i in range(0, len(self.links)):
+            self.links[i].record(links, i)
+
+        # Lists are used so that the results of many samples can be merged.
+        return {"samples": 1,
+                "metrics": self.metrics,
+                "links": links,
+                "cache_hits": [n.cache_hits for n in self.nodes],
+                "total_requests": [n.total_requests for n in self.nodes],
+                "pit_aggregations": [n.pending_interest.aggregations 
+                                     for n in self.nodes],
+                "pit_expired": [n.pending_interest.expired for n in self.nodes],
+                "pit_dropped": [n.pending_interest.dropped for n in self.nodes],
+                "unsolicited_data": [n.unsolicited_data for n in self.nodes],
+                "unrouted": [n.forwarding_base.unrouted for n in self.nodes]}
+
+    def end_warm_up(self):
+        """Drops everything measured so far in the sample, so the results 
+        only cover the time after the warm-up."""
+
+        self.metrics = stats.Metrics(self.reservoir_size, 
+                                     self.streams.random("metrics"), 
+                                     self.keep_raw)
+        for n in self.nodes:
+            n.cache_hits = 0
+            n.total_requests = 0
+            n.unsolicited_data = 0
+            n.pending_interest.aggregations = 0
+            n.pending_interest.expired = 0
+            n.pending_interest.dropped = 0
+            n.forwarding_base.unrouted = 0
+
+        for l in self.links:
+            l.reset()
+
+    def run(self, samples: int, seed: int = None, workers: int = 1) -> dict:
+        """Runs independent samples of the simulation.
+
+        Arguments:
+        samples -- int, number of samples to run
+        seed -- int, the seed of the whole run; None picks a random one
+        workers -- int, number of processes; 1 runs in this process
+
+        Returns: dictionary of merged results, see runner.merge; with a 
+                 precision, the run may stop before all samples"""
+
+        # Imported here since the runner imports this module.
+        import runner
+
+        return runner.run(samples, seed = seed, workers = workers, 
+                          config = self.config, precision = self.precision)
+
+
+def summarize(results: dict) -> dict:
+    """Calculates the main metrics from the merged results of samples.
+
+    Arguments:
+    results -- dictionary of merged sample results, see runner.merge
+
+    Returns: dictionary of metric names and values"""
+
+    metrics = results["metrics"]
+
+    # Calculate the average cache-hit ratio (cache_hits/total_requests).
+    total = 0
+    length = 0
+    for hits, requests in zip(results["cache_hits"], 
+                              results["total_requests"]):
+        if requests != 0:
+            total += hits/requests
+            length += 1
+
+    summary = {"samples": results["samples"],
+               "cache_hit_ratio": total/length if length else 0,
+               "hit_distance_mean": metrics.hit_distance.mean,
+               "hit_distance_variance": metrics.hit_distance.variance,
+               "return_time_mean": metrics.return_time.mean,
+               "return_time_variance": metrics.return_time.variance,
+               "hd_sample_variance": metrics.hd_samples.variance,
+               "rt_sample_variance": metrics.rt_samples.variance}
+
+    for k in range(1, 6):
+        summary["hit_distance_percent_%s" % k] = (
+            metrics.hit_distance_counts.percent(k))
+
+    summary.update(results["links"].summary())
+    # Simulated seconds the results were measured over, in all samples.
+    summary["simulated_time"] = results["links"].time
+
+    # PIT pressure: the share of interests aggregated into an existing 
+    # entry, and the entries and interests lost across all nodes, along 
+    # with the interests dropped for having no route.
+    requests = sum(results["total_requests"])
+    summary["pit_aggregation_ratio"] = (
+        sum(results["pit_aggregations"])/requests if requests else 0)
+    for key in ("pit_expired", "pit_dropped", "unsolicited_data", "unrouted"):
+        summary[key] = sum(results[key])
+
+    # When every value was kept, the metrics are calculated from them.
+    if metrics.raw is not None:
+        summary.update(metrics.raw.summary())
+
+    return summary
+
+
+def report(results: dict, graph: nx.Graph):
+    """Logs, plots and saves the merged results of all samples.
+
+    Arguments:
+    results -- dictionary of merged sample results, see runner.merge
+    graph -- networkx graph of the simulated network"""
+
+    summary = summarize(results)
+    hd_averages = results["metrics"].hd_averages.values
+    rt_averages = results["metrics"].rt_averages.values
+
+    logging.info("Average cache hit ratio: %s", summary["cache_hit_ratio"])
+
+    # Log the average hit distance and variance.
+    logging.info("Average hit distance: %s", summary["hit_distance_mean"])
+    logging.info("Hit distance variance across all interests: %s", 
+                 summary["hit_distance_variance"])
+
+    # Log the average return time and variance.
+    logging.info("Average return time: %s", summary["return_time_mean"])
+    logging.info("Return time variance across all interests: %s", 
+                 summary["return_time_variance"])
+
+    for k in range(1, 6):
+        logging.info("Percent %s: %s", k, 
+                     summary["hit_distance_percent_%s" % k])
+
+    # Log variance of the average hit distance of each sample.
+    logging.info("Hit distance variance across average hit distance of samples: %s", 
+                 summary["hd_sample_variance"])
+
+    # Log variance of the average return time of each sample.
+    logging.info("Return time variance across average return time of samples: %s", 
+                 summary["rt_sample_variance"])
+
+    # Log how busy and congested the links were.
+    logging.info("Average link utilization: %s", 
+                 summary["link_utilization_mean"])
+    logging.info("Average queue depth: %s", summary["queue_depth_mean"])
+    logging.info("Percent of packets dropped: %s", 100*summary["drop_ratio"])
+    logging.info("Simulated time in %s samples: %s s", summary["samples"], 
+                 summary["simulated_time"])
+
+
+    # Plot hit distance across samples.
+    seaborn.histplot(hd_averages)
+    plt.xlabel("Average Hit Distance in a Run")
+    plt.ylabel("Frequency")
+    mean = summary["hit_distance_mean"]
+    plt.title("Hit Distances Histogram With " + str(PROB) 
+              + " Probability of Caching: Mean = " + str(round(mean, 4)))
+    plt.show()
+
+
+    # Plot return times across samples.
+    seaborn.histplot(rt_averages)
+    plt.xlabel("Average Return Time in a Run")
+    plt.ylabel("Frequency")
+    mean = summary["return_time_mean"]
+    plt.title("Return Times Histogram With " + str(PROB) 
+              + " Probability of Caching: Mean = " + str(round(mean, 4)))
+    plt.show()
+
+
+    # Graph network.
+    center_node = 13
+    edge_nodes = set(graph) - {center_node}
+    pos = nx.circular_layout(graph.subgraph(edge_nodes))
+    pos[center_node] = numpy.array([0, 0])
+    nx.draw(graph)
+    plt.draw()
+    plt.show()
+
+    with open("data.csv", "w", newline = '') as csvfile:
+        field_names = ["Date", "Probability", "Sample Size", "Run Time", 
+                       "Average Hit Distance", "HD Variance Across Interests", 
+                       "HD Variance Across Samples", "HD Sample Averages", 
+                       "Average Return Time", "RT Variance Across Interests",
+                       "RT Variance Across Samples", "RT Sample Averages"]
+        dwriter = csv.DictWriter(csvfile, fieldnames=field_names)
+        dwriter.writeheader()
+        dwriter.writerow({"Date": datetime.datetime.now, "Probability": PROB, 
+                         "Sample Size": results["samples"], "Run Time": RUN_TIME, 
+                         "Average Hit Distance": summary["hit_distance_mean"], 
+                         "HD Variance Across Interests": summary["hit_distance_variance"], 
+                         "HD Variance Across Samples": summary["hd_sample_variance"], 
+                         "HD Sample Averages": hd_averages.tolist(),
+                         "Average Return Time": summary["return_time_mean"],
+                         "RT Variance Across Interests": summary["return_time_variance"],
+                         "RT Variance Across Samples": summary["rt_sample_variance"],
+                         "RT Sample Averages": rt_averages.tolist()})
+
+
+if __name__ == "__main__":
+    # Imported here since the runner imports this module in its workers.
+    import runner
+
+    if VALIDATE_ENGINE:
+        runner.validate_engine(3, seed = SEED)
+
+    if PROFILE:
+        import profiling
+
+        with profiling.Profiler() as profiler:
+            results = runner.run(SAMPLES, seed = SEED, workers = 1, 
+                                 precision = PRECISION)
+        profiler.report(PROFILE_OUTPUT)
+
+    else:
+        results = runner.run(SAMPLES, seed = SEED, workers = WORKERS, 
+                             precision = PRECISION)
+
+    report(results, network.graph_configuration()["graph"])
@@ -0,0 +1,546 @@
+import heapq
+import math
+import random
+import statistics
+import numpy
+
+# Confidence intervals use Student's t distribution from SciPy when it is 
+# installed; without it the normal distribution is used, which is close 
+# once there are a few tens of values.
+try:
+    import scipy.stats
+except ImportError:
+    scipy = None
+
+# Size of the batches MSER averages values in (MSER-5).
+MSER_BATCH = 5
+
+
+def critical_value(confidence: float, degrees: int) -> float:
+    """Critical value of a two-sided confidence interval.
+
+    Arguments:
+    confidence -- float, confidence level, e.g. 0.95
+    degrees -- int, degrees of freedom
+
+    Returns: float"""
+
+    if scipy is not None:
+        return float(scipy.stats.t.ppf((1 + confidence)/2, degrees))
+
+    return statistics.NormalDist().inv_cdf((1 + confidence)/2)
+
+
+def mser(values: numpy.ndarray, batch: int = MSER_BATCH) -> int:
+    """Finds where the start-up transient of a series ends with MSER 
+    (White, 1997): the number of leading values to drop which minimises 
+    the squared standard error of the mean of the rest. Values are first 
+    averaged in batches. A truncation in the second half of the series 
+    means the series has not settled yet.
+
+    Arguments:
+    values -- numpy array of values in the order they were measured
+    batch -- int, number of values averaged together
+
+    Returns: int, number of values to drop (a multiple of batch); None if 
+             the series has not settled or is too short"""
+
+    n = len(values)//batch
+    # A few batches are kept so the statistic does not fall to 0 at the end.
+    if n < 2*batch:
+        return None
+
+    means = numpy.asarray(values[:n*batch], float).reshape(n, batch).mean(axis = 1)
+    # Sums of the batch means from each point to the end.
+    s1 = numpy.cumsum(means[::-1])[::-1]
+    s2 = numpy.cumsum(means[::-1]**2)[::-1]
+    count = numpy.arange(n, 0, -1)
+    statistic = (s2 - s1**2/count)/count**2
+
+    best = int(numpy.argmin(statistic[:n - batch]))
+    if best > n//2:
+        return None
+
+    return best*batch
+
+
+class OnlineStats(object):
+    """Keeps the count, mean and variance of a stream of values without
+    storing the values (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared differences from the mean.
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        """Adds a value to the stream.
+
+        Arguments:
+        x -- float, the new value"""
+
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta/self.count
+        self.m2 += delta*(x - self.mean)
+
+    def merge(self, other: "OnlineStats"):
+        """Adds all the values of another stream (Chan et al.).
+
+        Arguments:
+        other -- OnlineStats object to merge into this one"""
+
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta*other.count/count
+        self.m2 += other.m2 + delta*delta*self.count*other.count/count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Sample variance, like statistics.variance; 0 for fewer than two
+        values."""
+
+        if self.count < 2:
+            return 0.0
+
+        return self.m2/(self.count - 1)
+
+    def half_width(self, confidence: float = 0.95) -> float:
+        """Half width of the confidence interval of the mean; inf for fewer 
+        than two values.
+
+        Arguments:
+        confidence -- float, confidence level
+
+        Returns: float"""
+
+        if self.count < 2:
+            return math.inf
+
+        return (critical_value(confidence, self.count - 1)
+                *math.sqrt(self.variance/self.count))
+
+
+class Histogram(object):
+    """Counts how many times each value occurs in a stream of ints."""
+
+    def __init__(self):
+        # Dictionary with values as keys and counts as values.
+        self.counts = {}
+        self.total = 0
+
+    def add(self, x: int):
+        self.counts[x] = self.counts.get(x, 0) + 1
+        self.total += 1
+
+    def merge(self, other: "Histogram"):
+        for x, c in other.counts.items():
+            self.counts[x] = self.counts.get(x, 0) + c
+        self.total += other.total
+
+    def percent(self, x: int) -> float:
+        """Percent of the values which are equal to x.
+
+        Returns: float"""
+
+        if self.total == 0:
+            return 0.0
+
+        return 100*self.counts.get(x, 0)/self.total
+
+
+class Reservoir(object):
+    """Keeps a uniform random sample of at most size values from a stream
+    (Algorithm R).
+
+    Arguments:
+    size -- int, max number of values kept
+    rng -- random.Random object used for the sampling"""
+
+    def __init__(self, size: int, rng: random.Random = None):
+        self.size = size
+        self.rng = rng or random.Random()
+        self.values = []
+        # Number of values seen, kept or not.
+        self.seen = 0
+
+    def add(self, x: float):
+        self.seen += 1
+        if len(self.values) < self.size:
+            self.values.append(x)
+
+        else:
+            i = self.rng.randrange(self.seen)
+            if i < self.size:
+                self.values[i] = x
+
+    def merge(self, other: "Reservoir"):
+        """Combines two samples so the result is a sample of both streams.
+        Each kept value stands for seen/len(values) values of its stream,
+        and values are chosen by weight without replacement."""
+
+        items = []
+        for r in (self, other):
+            if r.values:
+                weight = r.seen/len(r.values)
+                for x in r.values:
+                    # Efraimidis-Spirakis key for weighted sampling.
+                    items.append((self.rng.random()**(1/weight), x))
+
+        self.values = [x for key, x in heapq.nlargest(self.size, items)]
+        self.seen += other.seen
+
+
+class MetricBuffer(object):
+    """Growable typed array of values. Space is allocated ahead and doubled
+    when it runs out, so values are not stored as separate Python objects.
+
+    Arguments:
+    dtype -- numpy dtype of the values
+    capacity -- int, number of values allocated at first"""
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self.data = numpy.empty(capacity, dtype)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getstate__(self) -> dict:
+        # Only the used part of the buffer is pickled.
+        return {"data": self.values.copy(), "size": self.size}
+
+    @property
+    def values(self) -> numpy.ndarray:
+        """View of the values stored so far."""
+
+        return self.data[:self.size]
+
+    def reserve(self, needed: int):
+        """Makes sure there is room for needed values in total."""
+
+        if needed > len(self.data):
+            data = numpy.empty(max(needed, 2*len(self.data)), self.data.dtype)
+            data[:self.size] = self.values
+            self.data = data
+
+    def append(self, x):
+        if self.size == len(self.data):
+            self.reserve(self.size + 1)
+        self.data[self.size] = x
+        self.size += 1
+
+    def extend(self, values: numpy.ndarray):
+        self.reserve(self.size + len(values))
+        self.data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+
+class RawMetrics(object):
+    """Keeps every hit distance and return time, with the sample each came 
+    from, in typed buffers. The summary is calculated with NumPy."""
+
+    def __init__(self):
+        self.hit_distances = MetricBuffer(numpy.int32)
+        self.hd_samples = MetricBuffer(numpy.int32)
+        self.return_times = MetricBuffer(numpy.float64)
+        self.rt_samples = MetricBuffer(numpy.int32)
+        # Index of the current sample.
+        self.samples = 0
+
+    def add_hit_distance(self, hit_distance: int):
+        self.hit_distances.append(hit_distance)
+        self.hd_samples.append(self.samples)
+
+    def add_return_time(self, return_time: float):
+        self.return_times.append(return_time)
+        self.rt_samples.append(self.samples)
+
+    def end_sample(self):
+        self.samples += 1
+
+    def merge(self, other: "RawMetrics"):
+        """Adds the values of later samples, renumbering their samples."""
+
+        self.hit_distances.extend(other.hit_distances.values)
+        self.hd_samples.extend(other.hd_samples.values + self.samples)
+        self.return_times.extend(other.return_times.values)
+        self.rt_samples.extend(other.rt_samples.values + self.samples)
+        self.samples += other.samples
+
+    def sample_averages(self, values: MetricBuffer, 
+                        samples: MetricBuffer) -> numpy.ndarray:
+        """Average of the values of each sample; samples without values 
+        are left out.
+
+        Returns: numpy array"""
+
+        counts = numpy.bincount(samples.values, minlength = self.samples)
+        sums = numpy.bincount(samples.values, weights = values.values, 
+                              minlength = self.samples)
+        found = counts > 0
+        return sums[found]/counts[found]
+
+    def summary(self) -> dict:
+        """Calculates the metrics of simulation.summarize from the raw 
+        values.
+
+        Returns: dictionary of metric names and values"""
+
+        hd = self.hit_distances.values
+        rt = self.return_times.values
+        hd_averages = self.sample_averages(self.hit_distances, self.hd_samples)
+        rt_averages = self.sample_averages(self.return_times, self.rt_samples)
+
+        def variance(x):
+            return float(numpy.var(x, ddof = 1)) if len(x) > 1 else 0.0
+
+        summary = {"hit_distance_mean": float(hd.mean()) if len(hd) else 0.0,
+                   "hit_distance_variance": variance(hd),
+                   "return_time_mean": float(rt.mean()) if len(rt) else 0.0,
+                   "return_time_variance": variance(rt),
+                   "hd_sample_variance": variance(hd_averages),
+                   "rt_sample_variance": variance(rt_averages)}
+
+        counts = numpy.bincount(hd, minlength = 6)
+        for k in range(1, 6):
+            summary["hit_distance_percent_%s" % k] = (
+                float(100*counts[k]/len(hd)) if len(hd) else 0.0)
+
+        return summary
+
+
+class Metrics(object):
+    """Online accumulators for the metrics of a simulation. Memory does not
+    grow with the number of interests.
+
+    Arguments:
+    reservoir_size -- int, size of the random samples of raw values kept;
+                      0 keeps none
+    rng -- random.Random object used for the random samples
+    keep_raw -- boolean, whether every raw value is also kept"""
+
+    def __init__(self, reservoir_size: int = 0, rng: random.Random = None, 
+                 keep_raw: bool = False):
+        self.hit_distance = OnlineStats()
+        self.hit_distance_counts = Histogram()
+        self.return_time = OnlineStats()
+
+        # Average hit distance and return time of every finished sample, 
+        # and their mean and variance across samples.
+        self.hd_averages = MetricBuffer(numpy.float64)
+        self.rt_averages = MetricBuffer(numpy.float64)
+        self.hd_samples = OnlineStats()
+        self.rt_samples = OnlineStats()
+
+        self.hd_reservoir = None
+        self.rt_reservoir = None
+        if reservoir_size > 0:
+            self.hd_reservoir = Reservoir(reservoir_size, rng)
+            self.rt_reservoir = Reservoir(reservoir_size, rng)
+
+        self.raw = RawMetrics() if keep_raw else None
+
+    def add_hit_distance(self, hit_distance: int):
+        self.hit_distance.add(hit_distance)
+        self.hit_distance_counts.add(hit_distance)
+        if self.hd_reservoir is not None:
+            self.hd_reservoir.add(hit_distance)
+        if self.raw is not None:
+            self.raw.add_hit_distance(hit_distance)
+
+    def add_return_time(self, return_time: float):
+        self.return_time.add(return_time)
+        if self.rt_reservoir is not None:
+            self.rt_reservoir.add(return_time)
+        if self.raw is not None:
+            self.raw.add_return_time(return_time)
+
+    def end_sample(self):
+        """Records the averages of a sample; the metrics must only hold the
+        values of that one sample."""
+
+        if self.hit_distance.count:
+            self.hd_averages.append(self.hit_distance.mean)
+            self.hd_samples.add(self.hit_distance.mean)
+        if self.return_time.count:
+            self.rt_averages.append(self.return_time.mean)
+            self.rt_samples.add(self.return_time.mean)
+        if self.raw is not None:
+            self.raw.end_sample()
+
+    def merge(self, other: "Metrics"):
+        """Adds the metrics of other samples to these, keeping sample order.
+
+        Arguments:
+        other -- Metrics object to merge into this one"""
+
+        self.hit_distance.merge(other.hit_distance)
+        self.hit_distance_counts.merge(other.hit_distance_counts)
+        self.return_time.merge(other.return_time)
+        self.hd_averages.extend(other.hd_averages.values)
+        self.rt_averages.extend(other.rt_averages.values)
+        self.hd_samples.merge(other.hd_samples)
+        self.rt_samples.merge(other.rt_samples)
+
+        if self.hd_reservoir is not None and other.hd_reservoir is not None:
+            self.hd_reservoir.merge(other.hd_reservoir)
+            self.rt_reservoir.merge(other.rt_reservoir)
+
+        elif other.hd_reservoir is not None:
+            self.hd_reservoir = other.hd_reservoir
+            self.rt_reservoir = other.rt_reservoir
+
+        if self.raw is not None and other.raw is not None:
+            self.raw.merge(other.raw)
+
+        elif other.raw is not None:
+            self.raw = other.raw
+
+
+class SteadyState(object):
+    """Keeps the hit distances and return times of a sample in order, to 
+    find where the start-up transient ends (MSER-5) and how precise the 
+    mean of the rest is (batch means). It is used in place of the Metrics 
+    of a sample while it runs; replay then adds the values after the 
+    transient to the Metrics.
+
+    Arguments:
+    batches -- int, number of batches the values after the transient are 
+               split into
+    confidence -- float, confidence level of the intervals"""
+
+    def __init__(self, batches: int = 20, confidence: float = 0.95):
+        self.batches = batches
+        self.confidence = confidence
+        self.hit_distances = MetricBuffer(numpy.int32)
+        self.return_times = MetricBuffer(numpy.float64)
+
+    def add_hit_distance(self, hit_distance: int):
+        self.hit_distances.append(hit_distance)
+
+    def add_return_time(self, return_time: float):
+        self.return_times.append(return_time)
+
+    def interval(self, values: numpy.ndarray) -> tuple[float, float]:
+        """Calculates the mean of the values after the transient and the 
+        half width of its confidence interval, from the means of batches 
+        of those values.
+
+        Arguments:
+        values -- numpy array of values in the order they were measured
+
+        Returns: (mean, half width); None if the values have not settled 
+                 or there are too few for batches of MSER_BATCH values"""
+
+        start = mser(values)
+        if start is None:
+            return None
+
+        rest = values[start:]
+        size = len(rest)//self.batches
+        if size < MSER_BATCH:
+            return None
+
+        means = rest[:size*self.batches].reshape(self.batches, size).mean(axis = 1)
+        half = (critical_value(self.confidence, self.batches - 1)
+                *means.std(ddof = 1)/math.sqrt(self.batches))
+        return float(rest.mean()), float(half)
+
+    def converged(self, precision: float) -> bool:
+        """Whether both metrics have settled and the half widths of their 
+        confidence intervals are at most precision times their means.
+
+        Arguments:
+        precision -- float, largest relative half width
+
+        Returns: boolean"""
+
+        for values in (self.hit_distances.values, self.return_times.values):
+            result = self.interval(values)
+            if result is None or result[1] > precision*abs(result[0]):
+                return False
+
+        return True
+
+    def replay(self, metrics: "Metrics"):
+        """Adds the values after the transient of each metric to metrics; 
+        every value of a metric which has not settled.
+
+        Arguments:
+        metrics -- Metrics object of the sample"""
+
+        hd = self.hit_distances.values
+        for x in hd[mser(hd) or 0:].tolist():
+            metrics.add_hit_distance(x)
+
+        rt = self.return_times.values
+        for x in rt[mser(rt) or 0:].tolist():
+            metrics.add_return_time(x)
+
+
+class LinkMetrics(object):
+    """Totals of every link (one direction of a channel) across samples, 
+    in arrays indexed by link.
+
+    Arguments:
+    links -- int, number of links"""
+
+    def __init__(self, links: int = 0):
+        self.sent = numpy.zeros(links, numpy.int64)
+        self.dropped = numpy.zeros(links, numpy.int64)
+        # Seconds spent transmitting, and the integral of the number of 
+        # waiting packets over time.
+        self.busy_time = numpy.zeros(links)
+        self.queue_area = numpy.zeros(links)
+        self.max_queue = numpy.zeros(links, numpy.int64)
+        # Simulated seconds the totals were collected over.
+        self.time = 0.0
+
+    def merge(self, other: "LinkMetrics"):
+        """Adds the totals of other samples of the same network.
+
+        Arguments:
+        other -- LinkMetrics object to merge into this one"""
+
+        if len(self.sent) == 0:
+            self.__init__(len(other.sent))
+
+        self.sent += other.sent
+        self.dropped += other.dropped
+        self.busy_time += other.busy_time
+        self.queue_area += other.queue_area
+        self.max_queue = numpy.maximum(self.max_queue, other.max_queue)
+        self.time += other.time
+
+    @property
+    def utilization(self) -> numpy.ndarray:
+        """Fraction of the time each link was transmitting."""
+
+        return self.busy_time/self.time if self.time else self.busy_time
+
+    @property
+    def queue_depth(self) -> numpy.ndarray:
+        """Average number of packets waiting at each link."""
+
+        return self.queue_area/self.time if self.time else self.queue_area
+
+    def summary(self) -> dict:
+        """Calculates the link metrics of simulation.summarize.
+
+        Returns: dictionary of metric names and values"""
+
+        if len(self.sent) == 0:
+            return {}
+
+        offered = self.sent.sum() + self.dropped.sum()
+        return {"link_utilization_mean": float(self.utilization.mean()),
+                "link_utilization_max": float(self.utilization.max()),
+                "queue_depth_mean": float(self.queue_depth.mean()),
+                "queue_depth_max": int(self.max_queue.max()),
+                "drop_ratio": float(self.dropped.sum()/offered) if offered else 0.0}
@@ -0,0 +1,201 @@
+import concurrent.futures
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import simulation
+
+logging.basicConfig(level = logging.INFO)
+
+# User-set variables for a sweep.
+
+# Values of each Simulation argument; every combination is run.
+GRID = {"prob": [0.25, 0.5, 0.75, 1],
+        "cache_size": [5, 10, 20],
+        "mi_expire_time": [30, 60]}
+
+# Samples run for every point of the sweep.
+SAMPLES = 100
+# Every point uses the same seed so points are compared on equal terms.
+SEED = 0
+# Number of processes points are spread across; None uses every core.
+WORKERS = None
+
+# Finished points are appended to the checkpoint as they complete.
+CHECKPOINT = "sweep_checkpoint.jsonl"
+# Table with one row for every point of the sweep.
+OUTPUT = "sweep.csv"
+
+
+def grid(spec: dict[str, list]) -> list[dict]:
+    """Creates a point for every combination of the values in spec.
+
+    Arguments:
+    spec -- dictionary of Simulation arguments and lists of values
+
+    Returns: list of dictionaries of Simulation arguments"""
+
+    keys = sorted(spec)
+    points = []
+    for values in itertools.product(*(spec[k] for k in keys)):
+        points.append(dict(zip(keys, values)))
+
+    return points
+
+
+def random_search(spec: dict, points: int, seed: int = None) -> list[dict]:
+    """Creates points with values drawn at random from spec.
+
+    A list in spec is chosen from, a (low, high) tuple of ints is drawn
+    from with randint and a (low, high) tuple of floats with uniform.
+
+    Arguments:
+    spec -- dictionary of Simulation arguments and lists or ranges
+    points -- int, number of points to create
+    seed -- int, seed for drawing the points
+
+    Returns: list of dictionaries of Simulation arguments"""
+
+    rng = random.Random(seed)
+    keys = sorted(spec)
+    result = []
+    for i in range(0, points):
+        point = {}
+        for k in keys:
+            values = spec[k]
+            if isinstance(values, list):
+                point[k] = rng.choice(values)
+
+            elif isinstance(values[0], int) and isinstance(values[1], int):
+                point[k] = rng.randint(values[0], values[1])
+
+            else:
+                point[k] = rng.uniform(values[0], values[1])
+
+        result.append(point)
+
+    return result
+
+
+def point_key(point: dict) -> str:
+    """Creates a string which identifies a point in the checkpoint.
+
+    Arguments:
+    point -- dictionary of Simulation arguments
+
+    Returns: String"""
+
+    return json.dumps(point, sort_keys = True)
+
+
+def run_point(point: dict, samples: int, seed: int) -> dict:
+    """Runs the samples of one point in the current process.
+
+    Arguments:
+    point -- dictionary of Simulation arguments
+    samples -- int, number of samples to run
+    seed -- int, seed of the point
+
+    Returns: dictionary with the point and the summary of its results"""
+
+    sim = simulation.Simulation(**point)
+    summary = simulation.summarize(sim.run(samples, seed = seed, workers = 1))
+    return {"point": point, "summary": summary}
+
+
+def load_checkpoint(path: str) -> dict[str, dict]:
+    """Reads the points finished by an earlier, interrupted sweep.
+
+    Arguments:
+    path -- String, path of the checkpoint file
+
+    Returns: dictionary of point keys and finished rows"""
+
+    done = {}
+    if not os.path.exists(path):
+        return done
+
+    with open(path) as f:
+        for line in f:
+            # A line cut short by an interruption is simply run again.
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[point_key(row["point"])] = row
+
+    return done
+
+
+def write_table(rows: list[dict], path: str):
+    """Writes one row for every point, with its arguments and metrics.
+
+    Arguments:
+    rows -- list of dictionaries from run_point
+    path -- String, path of the CSV file"""
+
+    param_names = sorted({k for r in rows for k in r["point"]})
+    metric_names = sorted({k for r in rows for k in r["summary"]})
+
+    with open(path, "w", newline = '') as csvfile:
+        dwriter = csv.DictWriter(csvfile, fieldnames = param_names + metric_names)
+        dwriter.writeheader()
+        for r in rows:
+            dwriter.writerow({**r["point"], **r["summary"]})
+
+
+def sweep(points: list[dict], samples: int = SAMPLES, seed: int = SEED,
+          workers: int = WORKERS, checkpoint: str = CHECKPOINT,
+          output: str = OUTPUT) -> list[dict]:
+    """Runs every point across a pool of processes, skipping points already
+    in the checkpoint, and writes the consolidated table.
+
+    Arguments:
+    points -- list of dictionaries of Simulation arguments
+    samples -- int, number of samples run for every point
+    seed -- int, seed used for every point
+    workers -- int, number of processes; None uses every core
+    checkpoint -- String, path of the checkpoint file
+    output -- String, path of the CSV table
+
+    Returns: list of rows, in the order of points"""
+
+    done = load_checkpoint(checkpoint)
+    todo = [p for p in points if point_key(p) not in done]
+    logging.info("%s of %s points already done", len(points) - len(todo),
+                 len(points))
+
+    # The checkpoint is written again from the rows which could be read, 
+    # so a line cut short by an interruption does not swallow the next row.
+    # The new file replaces the old one only once it is complete.
+    with open(checkpoint + ".tmp", "w") as f:
+        for row in done.values():
+            f.write(json.dumps(row) + "\n")
+    os.replace(checkpoint + ".tmp", checkpoint)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    with open(checkpoint, "a") as f:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(run_point, p, samples, seed) for p in todo]
+            left = len(futures)
+
+            for future in concurrent.futures.as_completed(futures):
+                row = future.result()
+                done[point_key(row["point"])] = row
+                # Each point is saved as soon as it finishes.
+                f.write(json.dumps(row) + "\n")
+                f.flush()
+                left -= 1
+                logging.info("Finished point %s (%s left)", row["point"], left)
+
+    rows = [done[point_key(p)] for p in points]
+    write_table(rows, output)
+    return rows
+
+
+if __name__ == "__main__":
+    sweep(grid(GRID))
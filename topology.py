@@ -0,0 +1,216 @@
+import math
+import networkx as nx
+import numpy
+
+# Generators of synthetic networks for testing CS policies at scale. Like
+# network.graph_configuration, every generator returns a dictionary with a
+# networkx graph and a list of edge channels. Nodes are numbered from 0 and
+# have a "kind" attribute ("usv" or "uuv"); channel ids of the graph edges
+# and edge channels together run from 0 without gaps, and every channel has
+# a length in meters.
+
+# Range of the random lengths of edge channels, as in network.py.
+EDGE_LENGTH = (500, 2000)
+
+
+def finish(G: nx.Graph, candidates: list[int], edge_channels: int,
+           rng: numpy.random.Generator) -> dict:
+    """Numbers the channels of a graph and adds its edge channels.
+
+    Graph edges get ids in sorted order, followed by the edge channels.
+    Nodes without a kind are USVs if they have an edge channel and UUVs
+    otherwise.
+
+    Arguments:
+    G -- networkx graph with a "length" attribute on every edge
+    candidates -- list of node ids which may get an edge channel
+    edge_channels -- int, number of edge channels; None gives every
+                     candidate one
+    rng -- numpy random generator
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    next_id = 0
+    for u, v in sorted((min(e), max(e)) for e in G.edges):
+        G.edges[u, v]["id"] = next_id
+        next_id += 1
+
+    if edge_channels is None or edge_channels >= len(candidates):
+        chosen = sorted(candidates)
+    else:
+        chosen = sorted(rng.choice(candidates, edge_channels, replace = False))
+
+    edges = []
+    for n in chosen:
+        edges.append({"id": next_id, "node": int(n),
+                      "length": int(rng.integers(EDGE_LENGTH[0],
+                                                 EDGE_LENGTH[1]))})
+        next_id += 1
+
+    gateways = {e["node"] for e in edges}
+    for n in G.nodes:
+        G.nodes[n].setdefault("kind", "usv" if n in gateways else "uuv")
+
+    return {"graph": G, "edge_channels": edges}
+
+
+def fleet(clusters: int, uuvs: int, spacing: float = 1000,
+          depth_spacing: float = 1000, edge_channels: int = None,
+          seed: int = None) -> dict:
+    """Creates a fleet of clusters, each a USV with a chain of UUVs below it.
+    The USVs are connected in a line on the surface, and each has an edge
+    channel unless edge_channels is given.
+
+    Arguments:
+    clusters -- int, number of USVs
+    uuvs -- int, number of UUVs below each USV
+    spacing -- float, length in meters between neighbouring USVs
+    depth_spacing -- float, length in meters between vehicles of a cluster
+    edge_channels -- int, number of USVs with an edge channel
+    seed -- int, seed for the random lengths and choices
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    rng = numpy.random.default_rng(seed)
+    G = nx.Graph()
+    usvs = []
+    for c in range(0, clusters):
+        usv = c*(uuvs + 1)
+        usvs.append(usv)
+        G.add_node(usv, kind = "usv")
+        below = usv
+        for u in range(1, uuvs + 1):
+            G.add_node(usv + u, kind = "uuv")
+            G.add_edge(below, usv + u, length = depth_spacing)
+            below = usv + u
+
+        if c > 0:
+            G.add_edge(usvs[c - 1], usv, length = spacing)
+
+    return finish(G, usvs, edge_channels, rng)
+
+
+def tree(branching: int, depth: int, spacing: float = 1000,
+         edge_channels: int = None, seed: int = None) -> dict:
+    """Creates a balanced tree with a USV at the root. Edge channels are
+    attached to the leaves.
+
+    Arguments:
+    branching -- int, number of children of every inner node
+    depth -- int, number of levels below the root
+    spacing -- float, length in meters of every edge
+    edge_channels -- int, number of leaves with an edge channel; None gives
+                     every leaf one
+    seed -- int, seed for the random lengths and choices
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    rng = numpy.random.default_rng(seed)
+    G = nx.balanced_tree(branching, depth)
+    nx.set_edge_attributes(G, spacing, "length")
+    # The root is the only USV.
+    nx.set_node_attributes(G, "uuv", "kind")
+    G.nodes[0]["kind"] = "usv"
+
+    leaves = [n for n in G.nodes if G.degree(n) == 1 and n != 0]
+    return finish(G, leaves, edge_channels, rng)
+
+
+def grid(rows: int, columns: int, spacing: float = 1000,
+         edge_channels: int = None, seed: int = None) -> dict:
+    """Creates a grid of vehicles with edge channels on its border.
+
+    Arguments:
+    rows -- int, number of rows
+    columns -- int, number of columns
+    spacing -- float, length in meters between neighbouring vehicles
+    edge_channels -- int, number of border nodes with an edge channel; None
+                     gives every border node one
+    seed -- int, seed for the random lengths and choices
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    rng = numpy.random.default_rng(seed)
+    G = nx.grid_2d_graph(rows, columns)
+    # Nodes are numbered row by row.
+    G = nx.relabel_nodes(G, {(r, c): r*columns + c for r, c in G.nodes})
+    nx.set_edge_attributes(G, spacing, "length")
+
+    border = [n for n in G.nodes
+              if n // columns in (0, rows - 1) or n % columns in (0, columns - 1)]
+    return finish(G, border, edge_channels, rng)
+
+
+def random_geometric(nodes: int, area: float, acoustic_range: float,
+                     edge_channels: int = 4, seed: int = None) -> dict:
+    """Places vehicles at random in a square area and connects every pair
+    within acoustic range, with the distance as the length of the channel.
+    Separate groups are joined to the rest by a link between their closest
+    vehicles, so every node can reach every producer.
+
+    Arguments:
+    nodes -- int, number of vehicles
+    area -- float, side of the square area in meters
+    acoustic_range -- float, max distance in meters of a link
+    edge_channels -- int, number of vehicles with an edge channel; None
+                     gives every vehicle one
+    seed -- int, seed for the positions, lengths and choices
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    rng = numpy.random.default_rng(seed)
+    points = rng.uniform(0, area, (nodes, 2))
+    pos = {n: tuple(points[n]) for n in range(0, nodes)}
+    G = nx.random_geometric_graph(nodes, acoustic_range, pos = pos)
+
+    groups = sorted(nx.connected_components(G), key = min)
+    joined = list(groups[0])
+    for group in groups[1:]:
+        members = list(group)
+        # Distances between every vehicle of the group and the joined ones.
+        d = numpy.linalg.norm(points[members][:, None] - points[joined][None],
+                              axis = 2)
+        i, j = numpy.unravel_index(numpy.argmin(d), d.shape)
+        G.add_edge(members[i], joined[j])
+        joined.extend(members)
+
+    for u, v in G.edges:
+        G.edges[u, v]["length"] = max(1, int(round(
+            math.dist(points[u], points[v]))))
+
+    return finish(G, list(G.nodes), edge_channels, rng)
+
+
+def hub_and_spoke(hubs: int, spokes: int, hub_spacing: float = 2000,
+                  spoke_spacing: float = 1000, edge_channels: int = None,
+                  seed: int = None) -> dict:
+    """Creates USV hubs connected in a ring, each with UUV spokes. Edge
+    channels are attached to the hubs.
+
+    Arguments:
+    hubs -- int, number of hubs
+    spokes -- int, number of UUVs connected to each hub
+    hub_spacing -- float, length in meters between neighbouring hubs
+    spoke_spacing -- float, length in meters between a hub and its spokes
+    edge_channels -- int, number of hubs with an edge channel; None gives
+                     every hub one
+    seed -- int, seed for the random lengths and choices
+
+    Returns: dictionary with the graph and the list of edge channels"""
+
+    rng = numpy.random.default_rng(seed)
+    G = nx.Graph()
+    centers = []
+    for h in range(0, hubs):
+        hub = h*(spokes + 1)
+        centers.append(hub)
+        G.add_node(hub, kind = "usv")
+        for s in range(1, spokes + 1):
+            G.add_node(hub + s, kind = "uuv")
+            G.add_edge(hub, hub + s, length = spoke_spacing)
+
+    # Two hubs are joined once; a ring needs at least three.
+    for h in range(0, hubs if hubs > 2 else hubs - 1):
+        G.add_edge(centers[h], centers[(h + 1) % hubs], length = hub_spacing)
+
+    return finish(G, centers, edge_channels, rng)
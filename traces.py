@@ -0,0 +1,138 @@
+import json
+import os
+import numpy
+import workloads
+
+# A trace is a binary file of fixed-size records, one for every interest, in
+# order of arrival. Names are stored as indexes into a list of data names
+# kept next to the trace, so a trace can be replayed in any simulation
+# which has those names and edge channels.
+TRACE_DTYPE = numpy.dtype([("time", "<f8"), ("channel", "<i4"),
+                           ("name", "<i4")])
+
+
+def names_path(path: str) -> str:
+    """Path of the list of data names of a trace."""
+
+    return path + ".names.json"
+
+
+def record(path: str, sim, seed: int = None, duration: float = None) -> int:
+    """Draws the interests of a workload and writes them to a trace.
+    Workloads do not depend on the simulation, so no simulation is run.
+
+    Arguments:
+    path -- String, path of the trace
+    sim -- Simulation object whose workload, edge channels and names are used
+    seed -- int, seed of the sample the workload is drawn for
+    duration -- float, seconds of interests recorded; None uses the run
+                time of the simulation
+
+    Returns: int, number of interests recorded"""
+
+    if duration is None:
+        duration = sim.run_time
+
+    sim.setup(seed)
+    workload = sim.workload
+
+    count = 0
+    with open(path, "wb") as f:
+        while True:
+            times, channel_ids, name_ids = workload.next_batch()
+            keep = times <= duration
+            rows = numpy.empty(int(keep.sum()), TRACE_DTYPE)
+            rows["time"] = times[keep]
+            rows["channel"] = channel_ids[keep]
+            rows["name"] = name_ids[keep]
+            f.write(rows.tobytes())
+            count += len(rows)
+
+            if len(times) == 0 or not keep.all():
+                break
+
+    with open(names_path(path), "w") as f:
+        json.dump(sim.registry.names, f)
+
+    return count
+
+
+class TraceWorkload(workloads.Workload):
+    """Replays the interests of a trace. The trace is memory-mapped and
+    read a batch at a time, so it is never loaded as a whole. Every sample
+    replays the same interests, which makes runs of different
+    configurations directly comparable.
+
+    Arguments:
+    path -- String, path of the trace
+    batch_size -- int, number of interests read at a time"""
+
+    def __init__(self, path: str, batch_size: int = 4096):
+        super().__init__(batch_size)
+        self.path = path
+
+    def start(self, sim, rng: numpy.random.Generator):
+        super().start(sim, rng)
+        # An empty file cannot be memory-mapped.
+        if os.path.getsize(self.path) == 0:
+            self.rows = numpy.empty(0, TRACE_DTYPE)
+        else:
+            self.rows = numpy.memmap(self.path, TRACE_DTYPE, mode = "r")
+        self.position = 0
+
+        with open(names_path(self.path)) as f:
+            names = json.load(f)
+
+        # Name ids of the simulation, indexed by the name indexes of the trace.
+        self.name_ids = numpy.full(len(names), -1, numpy.int64)
+        for i in range(0, len(names)):
+            self.name_ids[i] = sim.registry.ids.get(names[i], -1)
+
+        # Every channel of the trace must be an edge channel of the 
+        # simulation, checked a batch at a time to keep the trace on disk.
+        channels = set()
+        for i in range(0, len(self.rows), self.batch_size):
+            batch = self.rows[i:i + self.batch_size]
+            channels.update(numpy.unique(batch["channel"]).tolist())
+        missing = sorted(channels - {e["id"] for e in sim.edge_channels})
+        if missing:
+            raise ValueError("Trace %s sends interests on channels %s, which "
+                             "are not edge channels of the simulation"
+                             % (self.path, missing))
+
+    def __getstate__(self) -> dict:
+        # The memory map is opened again by start in each process.
+        state = self.__dict__.copy()
+        state.pop("rows", None)
+        return state
+
+    def next_batch(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        rows = self.rows[self.position:self.position + self.batch_size]
+        self.position += len(rows)
+
+        name_ids = self.name_ids[rows["name"]]
+        if (name_ids < 0).any():
+            raise ValueError("Trace %s requests names the simulation does not have"
+                             % self.path)
+
+        return (numpy.array(rows["time"]), numpy.array(rows["channel"]),
+                name_ids)
+
+    def rates(self, registry) -> numpy.ndarray:
+        rates = numpy.zeros((len(self.channel_ids), len(registry)))
+        if len(self.rows) == 0:
+            return rates
+
+        # Rows of the result, indexed by channel id.
+        rows = numpy.full(self.channel_ids.max() + 1, -1)
+        rows[self.channel_ids] = numpy.arange(0, len(self.channel_ids))
+
+        for i in range(0, len(self.rows), self.batch_size):
+            batch = self.rows[i:i + self.batch_size]
+            # Names the simulation does not have are left out.
+            name_ids = self.name_ids[batch["name"]]
+            known = name_ids >= 0
+            numpy.add.at(rates, (rows[batch["channel"]][known],
+                                 name_ids[known]), 1)
+
+        return rates/self.rows[-1]["time"]
@@ -0,0 +1,263 @@
+import numpy
+
+# Interest workloads. A workload draws interests in batches with NumPy: the
+# arrival time, edge channel and name id of every interest, so the arrival
+# process only has to wait for each time and send the interest.
+
+
+class Popularity(object):
+    """Base class for the popularity of data names: the probability that an
+    interest asks for each name."""
+
+    def probabilities(self, registry, rng: numpy.random.Generator) -> numpy.ndarray:
+        """Calculates the probability of every name.
+
+        Arguments:
+        registry -- NameRegistry of the simulation
+        rng -- numpy random generator
+
+        Returns: numpy array of probabilities indexed by name id"""
+
+        raise NotImplementedError
+
+
+class UniformPopularity(Popularity):
+    """Every name is requested equally often."""
+
+    def probabilities(self, registry, rng: numpy.random.Generator) -> numpy.ndarray:
+        return numpy.full(len(registry), 1/len(registry))
+
+
+class ZipfPopularity(Popularity):
+    """The name of rank k is requested with a probability proportional to
+    1/k^alpha. Ranks follow name ids unless shuffled.
+
+    Arguments:
+    alpha -- float, skew of the distribution
+    shuffle -- boolean, whether names get random ranks in each sample"""
+
+    def __init__(self, alpha: float = 0.8, shuffle: bool = False):
+        self.alpha = alpha
+        self.shuffle = shuffle
+
+    def weights(self, ranks: numpy.ndarray) -> numpy.ndarray:
+        return ranks**-self.alpha
+
+    def probabilities(self, registry, rng: numpy.random.Generator) -> numpy.ndarray:
+        p = self.weights(numpy.arange(1, len(registry) + 1, dtype = float))
+        if self.shuffle:
+            p = rng.permutation(p)
+
+        return p/p.sum()
+
+
+class MandelbrotZipfPopularity(ZipfPopularity):
+    """The name of rank k is requested with a probability proportional to
+    1/(k + q)^alpha, which flattens the most popular names.
+
+    Arguments:
+    alpha -- float, skew of the distribution
+    q -- float, plateau of the distribution
+    shuffle -- boolean, whether names get random ranks in each sample"""
+
+    def __init__(self, alpha: float = 0.8, q: float = 5, shuffle: bool = False):
+        super().__init__(alpha, shuffle)
+        self.q = q
+
+    def weights(self, ranks: numpy.ndarray) -> numpy.ndarray:
+        return (ranks + self.q)**-self.alpha
+
+
+class TracePopularity(Popularity):
+    """Names are requested as often as they were in a recorded trace.
+    Names of the trace which the simulation does not have are left out.
+
+    Arguments:
+    counts -- dictionary with data names as keys and request counts as values"""
+
+    def __init__(self, counts: dict[str, int]):
+        self.counts = counts
+
+    @classmethod
+    def from_file(cls, path: str) -> "TracePopularity":
+        """Counts the names in a text file with one requested name per line.
+
+        Arguments:
+        path -- String, path of the file
+
+        Returns: TracePopularity"""
+
+        counts = {}
+        with open(path) as f:
+            for line in f:
+                name = line.strip()
+                if name:
+                    counts[name] = counts.get(name, 0) + 1
+
+        return cls(counts)
+
+    def probabilities(self, registry, rng: numpy.random.Generator) -> numpy.ndarray:
+        p = numpy.zeros(len(registry))
+        for name, count in self.counts.items():
+            if name in registry.ids:
+                p[registry.ids[name]] = count
+
+        if p.sum() == 0:
+            raise ValueError("No name of the trace is in the simulation")
+
+        return p/p.sum()
+
+
+class Workload(object):
+    """Base class for interest workloads.
+
+    Arguments:
+    batch_size -- int, number of interests drawn at a time"""
+
+    def __init__(self, batch_size: int = 4096):
+        self.batch_size = batch_size
+        self.rng = None
+
+    def start(self, sim, rng: numpy.random.Generator):
+        """Prepares the workload for a new sample.
+
+        Arguments:
+        sim -- Simulation object the interests are sent into
+        rng -- numpy random generator of the sample"""
+
+        # Only what is needed is kept, so the workload can still be pickled.
+        self.rng = rng
+        # Ids of the channels interests can be sent through.
+        self.channel_ids = numpy.array([e["id"] for e in sim.edge_channels])
+
+    def next_batch(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """Draws the next interests, in order of arrival.
+
+        Returns: arrays of arrival times, edge channel ids and name ids;
+                 empty arrays once the workload has ended"""
+
+        raise NotImplementedError
+
+    def rates(self, registry) -> numpy.ndarray:
+        """Calculates the mean number of interests per second for every 
+        name at every edge channel, for analytic estimates (see analytic.py).
+
+        Arguments:
+        registry -- NameRegistry of the simulation
+
+        Returns: 2D numpy array with a row for each of channel_ids and a 
+                 column for each name id"""
+
+        raise NotImplementedError
+
+
+class PoissonWorkload(Workload):
+    """Consumers at the edge channels send interests as Poisson processes.
+    Together they form one Poisson process of rate*consumers, and each
+    interest comes from a random consumer, so thousands of consumers cost
+    no more than one.
+
+    Arguments:
+    rate -- float, interests per second sent by each consumer
+    popularity -- Popularity object choosing the names requested
+    consumers -- int, number of consumers, spread evenly across the edge
+                 channels
+    batch_size -- int, number of interests drawn at a time"""
+
+    def __init__(self, rate: float = 1, popularity: Popularity = None,
+                 consumers: int = 1, batch_size: int = 4096):
+        super().__init__(batch_size)
+        self.rate = rate
+        self.popularity = popularity or ZipfPopularity()
+        self.consumers = consumers
+
+    def start(self, sim, rng: numpy.random.Generator):
+        super().start(sim, rng)
+        self.cdf = numpy.cumsum(self.popularity.probabilities(sim.registry, rng))
+        # Consumer i is at edge channel i % (number of edge channels).
+        self.consumer_channels = self.channel_ids[
+            numpy.arange(0, self.consumers) % len(self.channel_ids)]
+        self.time = 0.0
+
+    def next_batch(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        rng = self.rng
+        gaps = rng.exponential(1/(self.rate*self.consumers), self.batch_size)
+        times = self.time + numpy.cumsum(gaps)
+        self.time = times[-1]
+
+        channels = self.consumer_channels[
+            rng.integers(0, self.consumers, self.batch_size)]
+        names = numpy.searchsorted(self.cdf, rng.random(self.batch_size)
+                                   * self.cdf[-1], side = "right")
+        return times, channels, names
+
+    def rates(self, registry) -> numpy.ndarray:
+        p = numpy.diff(self.cdf, prepend = 0)/self.cdf[-1]
+        # Number of consumers at each edge channel.
+        consumers = numpy.bincount(
+            numpy.arange(0, self.consumers) % len(self.channel_ids),
+            minlength = len(self.channel_ids))
+        return self.rate*numpy.outer(consumers, p)
+
+
+class LegacyWorkload(Workload):
+    """The original workload: an interest every 0.5 to 1.5 seconds for a
+    random name of a random producer, through a random edge channel, with
+    a share of the interests asking for the data of one hot node.
+
+    Arguments:
+    hot_node -- int, node requested more often, if the network has it; 
+                None requests every producer equally
+    hot_prob -- float, probability an interest asks for the hot node
+    batch_size -- int, number of interests drawn at a time"""
+
+    def __init__(self, hot_node: int = None, hot_prob: float = 0.3,
+                 batch_size: int = 4096):
+        super().__init__(batch_size)
+        self.hot_node = hot_node
+        self.hot_prob = hot_prob
+
+    def start(self, sim, rng: numpy.random.Generator):
+        super().start(sim, rng)
+        by_producer = sim.registry.by_producer
+        self.producers = numpy.array(sorted(by_producer))
+        # Name ids of every producer in one array, with the start of each.
+        self.names = numpy.concatenate([by_producer[p] for p in self.producers])
+        self.offsets = numpy.cumsum([0] + [len(by_producer[p])
+                                           for p in self.producers])
+        self.hot = []
+        if self.hot_node is not None:
+            self.hot = numpy.flatnonzero(self.producers == self.hot_node)
+        self.time = 0.0
+
+    def next_batch(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        rng = self.rng
+        size = self.batch_size
+        times = self.time + numpy.cumsum(rng.uniform(0.5, 1.5, size))
+        self.time = times[-1]
+
+        producers = rng.integers(0, len(self.producers), size)
+        if len(self.hot):
+            producers[rng.random(size) < self.hot_prob] = self.hot[0]
+
+        counts = self.offsets[producers + 1] - self.offsets[producers]
+        names = self.names[self.offsets[producers]
+                           + (rng.random(size)*counts).astype(int)]
+        channels = self.channel_ids[rng.integers(0, len(self.channel_ids), size)]
+        return times, channels, names
+
+    def rates(self, registry) -> numpy.ndarray:
+        # Producers are chosen uniformly, except for the share of interests 
+        # which go to the hot node, and names uniformly within a producer.
+        producers = numpy.full(len(self.producers), 1/len(self.producers))
+        if len(self.hot):
+            producers *= 1 - self.hot_prob
+            producers[self.hot[0]] += self.hot_prob
+
+        counts = numpy.diff(self.offsets)
+        p = numpy.zeros(len(registry))
+        p[self.names] = numpy.repeat(producers/counts, counts)
+
+        # Gaps between interests are 1 second on average.
+        return numpy.outer(numpy.full(len(self.channel_ids),
+                                      1/len(self.channel_ids)), p)